@@ -1,7 +1,9 @@
-import networkx as nx
+from graph_cache import load_graph
+from null_models import er_edges, configuration_edges, to_graph
+from config import data_path
 
 # Load the original graph
-G = nx.read_gexf("reseaux_complexes/football_network.gexf")
+G = load_graph(data_path('football_network.gexf'))
 
 # Step 1: Get the parameters of the original graph
 N = G.number_of_nodes()
@@ -14,13 +16,11 @@ p = 2 * E / (N * (N - 1))
 print("p=", p)  
 
 # Step 2: Generate 3 Erdős-Rényi graphs
-erdos_renyi_graphs = [nx.erdos_renyi_graph(N, p) for _ in range(3)]
+erdos_renyi_graphs = [to_graph(N, *er_edges(N, p)) for _ in range(3)]
 
 # Step 3: Generate 8 graphs according to the Configuration model
-configuration_graphs = [nx.configuration_model(degree_sequence) for _ in range(8)]
-
-# Convert MultiGraphs to simple Graphs (removing loops and multiple edges)
-configuration_graphs = [nx.Graph(graph) for graph in configuration_graphs]
+# (loops and multiple edges are removed while pairing the stubs, no MultiGraph is built)
+configuration_graphs = [to_graph(N, *configuration_edges(degree_sequence)) for _ in range(8)]
 
 # Function to display graph information
 def print_graph_info(graphs, title_prefix):
@@ -0,0 +1,156 @@
+import time
+
+import numpy as np
+import pandas as pd
+import networkx as nx
+from scipy.stats import spearmanr
+
+from clustering import clustering
+from communities import detect_communities
+from csr import to_csr, csr_edges, undirected_to_csr, from_csr
+from betweenness import betweenness_centrality
+from distances import giant_component_csr, diameter, distance_distribution
+from spectral import spectral_centralities
+
+
+# Function to compute the disparity filter p-value of every edge (Serrano, Boguñá & Vespignani, 2009)
+def disparity_pvalues(u, v, weights, n_nodes):
+    """For an edge of weight w at a node of strength s and degree k, the
+    p-value is (1 - w / s) ** (k - 1): the probability that a uniform split of
+    s over k edges gives one edge at least w. An edge gets the smaller p-value
+    of its two ends; edges of degree-1 nodes only count at their other end."""
+    weights = np.asarray(weights, dtype=np.float64)
+    ends = np.concatenate([u, v])
+    strength = np.bincount(ends, weights=np.concatenate([weights, weights]), minlength=n_nodes)
+    degree = np.bincount(ends, minlength=n_nodes)
+
+    def end_pvalues(node):
+        share = np.divide(weights, strength[node], out=np.zeros(len(weights)), where=strength[node] > 0)
+        return np.where(degree[node] > 1, (1 - share) ** (degree[node] - 1), 1.0)
+
+    return np.minimum(end_pvalues(u), end_pvalues(v))
+
+
+# Function to keep, for every node, its k heaviest edges (an edge stays if it is in the top k of either end)
+def top_k_mask(u, v, weights, n_nodes, k):
+    edge = np.arange(len(u))
+    rows = np.concatenate([u, v])
+    edges = np.concatenate([edge, edge])
+    weights = np.concatenate([weights, weights])
+    order = np.lexsort((edges, -weights, rows))
+    starts = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n_nodes))[:-1]])
+    rank = np.arange(len(order)) - starts[rows[order]]
+    keep = np.zeros(len(u), dtype=bool)
+    keep[edges[order][rank < k]] = True
+    return keep
+
+
+# Function to extract the backbone of a weighted graph with any combination of the three filters
+def backbone(graph, alpha=None, min_weight=None, top_k=None, weight='weight'):
+    """Keep the edges with a disparity p-value below alpha, a weight of at
+    least min_weight and among the top_k heaviest edges of one of their ends
+    (filters left to None are not applied). Every node is kept, isolated or
+    not, so node metrics of the backbone line up with those of the graph.
+    Return a graph of the same kind (networkx or CompactGraph)."""
+    nodes, indptr, indices, weights = to_csr(graph, weight=weight)
+    u, v, w = csr_edges(indptr, indices, weights)
+    keep = np.ones(len(u), dtype=bool)
+    if alpha is not None:
+        keep &= disparity_pvalues(u, v, w, len(nodes)) < alpha
+    if min_weight is not None:
+        keep &= w >= min_weight
+    if top_k is not None:
+        keep &= top_k_mask(u, v, w, len(nodes), top_k)
+
+    if hasattr(graph, 'csr_arrays'):
+        new_indptr, new_indices, new_weights = undirected_to_csr(u[keep], v[keep], len(nodes), w[keep])
+        return type(graph)(graph.player_ids, new_indptr, new_indices.astype(np.int32),
+                           new_weights.astype(graph.weights.dtype), dict(graph.attributes))
+    H = from_csr(nodes, *undirected_to_csr(u[keep], v[keep], len(nodes), w[keep]), weight=weight or 'weight')
+    nx.set_node_attributes(H, dict(graph.nodes(data=True)))
+    return H
+
+
+def _as_networkx(graph):
+    return graph.to_networkx() if hasattr(graph, 'to_networkx') else graph
+
+
+def _timed(func, graph):
+    start = time.perf_counter()
+    value = func(graph)
+    return value, time.perf_counter() - start
+
+
+def _giant_component_size(graph):
+    return len(giant_component_csr(graph)[0])
+
+
+def _louvain(graph):
+    result = detect_communities(_as_networkx(graph), seeds=(0,), cache_dir=None)
+    return result['modularity'], len(result['communities'])
+
+
+def _node_metrics(graph):
+    nodes, indptr, indices, weights = to_csr(graph)
+    strength = np.bincount(np.repeat(np.arange(len(nodes)), np.diff(indptr)), weights=weights, minlength=len(nodes))
+    table = spectral_centralities(graph)[['eigenvector', 'pagerank', 'pagerank_weighted']]
+    table['strength'] = strength
+    return table
+
+
+# Whole-graph metrics compared by fidelity_report: name -> function(graph) giving a number (or a tuple of numbers)
+SCALAR_METRICS = {
+    'giant_component_size': _giant_component_size,
+    'average_clustering': lambda graph: clustering(graph, weight=None)['average'],
+    'diameter': diameter,
+    'average_path_length': lambda graph: distance_distribution(graph)[1],
+    'louvain': _louvain,
+}
+
+# Node metrics compared by rank correlation and top-k overlap
+NODE_METRICS = {
+    'betweenness': lambda graph: pd.DataFrame({'betweenness': pd.Series(betweenness_centrality(graph))}),
+    'spectral': _node_metrics,
+}
+
+
+# Function to measure how much each downstream metric changes between the graph and its backbone
+def fidelity_report(graph, backbone_graph, metrics=None, node_metrics=None, top=50, weight='weight'):
+    """Return a DataFrame with one row per metric: the value on the graph, on
+    the backbone and the relative change for whole-graph metrics; the
+    Spearman correlation and the overlap of the `top` highest nodes for node
+    metrics; and the time each metric took on both graphs (speedup)."""
+    metrics = SCALAR_METRICS if metrics is None else {name: SCALAR_METRICS[name] for name in metrics}
+    node_metrics = NODE_METRICS if node_metrics is None else {name: NODE_METRICS[name] for name in node_metrics}
+    _, _, _, weights = to_csr(graph, weight=weight)
+    _, _, _, backbone_weights = to_csr(backbone_graph, weight=weight)
+    rows = [
+        {'metric': 'edges', 'original': len(weights) / 2, 'backbone': len(backbone_weights) / 2},
+        {'metric': 'total_weight', 'original': weights.sum() / 2, 'backbone': backbone_weights.sum() / 2},
+    ]
+
+    for name, func in metrics.items():
+        original, original_time = _timed(func, graph)
+        reduced, reduced_time = _timed(func, backbone_graph)
+        if name == 'louvain':
+            rows.append({'metric': 'modularity', 'original': original[0], 'backbone': reduced[0],
+                         'original_seconds': original_time, 'backbone_seconds': reduced_time})
+            rows.append({'metric': 'communities', 'original': original[1], 'backbone': reduced[1]})
+        else:
+            rows.append({'metric': name, 'original': original, 'backbone': reduced,
+                         'original_seconds': original_time, 'backbone_seconds': reduced_time})
+
+    for name, func in node_metrics.items():
+        original, original_time = _timed(func, graph)
+        reduced, reduced_time = _timed(func, backbone_graph)
+        reduced = reduced.reindex(original.index)
+        for column in original.columns:
+            a, b = original[column], reduced[column].fillna(0)
+            overlap = len(set(a.nlargest(top).index) & set(b.nlargest(top).index)) / min(top, len(a))
+            rows.append({'metric': column, 'spearman': spearmanr(a, b).statistic, f'top_{top}_overlap': overlap,
+                         'original_seconds': original_time, 'backbone_seconds': reduced_time})
+
+    report = pd.DataFrame(rows).set_index('metric')
+    report['relative_change'] = (report['backbone'] - report['original']) / report['original'].replace(0, np.nan)
+    report['speedup'] = report['original_seconds'] / report['backbone_seconds']
+    return report
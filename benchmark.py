@@ -0,0 +1,214 @@
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from ingestion import CoappearanceAccumulator
+from betweenness import approximate_betweenness
+from spectral import spectral_centralities
+from distances import giant_component_csr, diameter
+from communities import detect_communities
+from percolation import simulate_percolation
+from null_models import configuration_edges, rewired_edges
+from csr import to_csr, csr_edges
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+# Function to generate a synthetic appearances table with the columns of appearances.csv
+def synthetic_appearances(n_rows, n_competitions=None, clubs_per_competition=20, squad_size=25,
+                          players_per_game=14, transfer_rate=0.2, seasons=2, seed=0):
+    """Every game opposes two clubs of the same competition and each club lines
+    up players_per_game players of its squad. A season lasts a double round
+    robin; between two seasons a fraction transfer_rate of the squad places
+    is changed, half by transfers between clubs and half by new players.
+
+    By default the number of competitions grows with n_rows so that the table
+    covers about `seasons` seasons: the number of players (graph nodes) is
+    then proportional to n_rows, instead of only the number of seasons."""
+    rng = np.random.default_rng(seed)
+    if n_competitions is None:
+        games_per_competition = max(1, seasons) * clubs_per_competition * (clubs_per_competition - 1)
+        n_competitions = max(1, -(-n_rows // (2 * players_per_game * games_per_competition)))
+    n_clubs = n_competitions * clubs_per_competition
+    n_games = max(1, n_rows // (2 * players_per_game))
+    games_per_season = n_competitions * clubs_per_competition * (clubs_per_competition - 1)
+    n_seasons = n_games // games_per_season + 1
+
+    # Squads of every club for every season, shape (season, club, squad_size)
+    squads = np.empty((n_seasons, n_clubs, squad_size), dtype=np.int64)
+    squads[0] = np.arange(n_clubs * squad_size).reshape(n_clubs, squad_size)
+    next_player = n_clubs * squad_size
+    for season in range(1, n_seasons):
+        squad = squads[season - 1].ravel().copy()
+        changed = rng.choice(len(squad), size=int(transfer_rate * len(squad)), replace=False)
+        transfers, newcomers = changed[:len(changed) // 2], changed[len(changed) // 2:]
+        squad[transfers] = squad[rng.permutation(transfers)]
+        squad[newcomers] = np.arange(next_player, next_player + len(newcomers))
+        next_player += len(newcomers)
+        squads[season] = squad.reshape(n_clubs, squad_size)
+
+    game = np.arange(n_games)
+    competition = game % n_competitions
+    season = game // games_per_season
+    home = competition * clubs_per_competition + rng.integers(0, clubs_per_competition, n_games)
+    away = competition * clubs_per_competition + (home % clubs_per_competition
+                                                  + rng.integers(1, clubs_per_competition, n_games)) % clubs_per_competition
+    dates = pd.Timestamp('2000-07-01') + pd.to_timedelta(season * 365 + (game % games_per_season) * 300 // games_per_season, unit='D')
+
+    # Line-ups: players_per_game random places of the squad, for both clubs of every game
+    clubs = np.concatenate([home, away])
+    games = np.concatenate([game, game])
+    slots = np.argsort(rng.random((len(clubs), squad_size)), axis=1)[:, :players_per_game]
+    players = squads[np.concatenate([season, season])[:, None], clubs[:, None], slots]
+
+    df = pd.DataFrame({
+        'game_id': np.repeat(games, players_per_game).astype(np.int32),
+        'player_id': players.ravel().astype(np.int32),
+        'player_club': pd.Categorical(np.repeat(clubs, players_per_game).astype(str)),
+        'competition_id': pd.Categorical(np.repeat(competition[games], players_per_game).astype(str)),
+        'date': np.repeat(dates.strftime('%Y-%m-%d').to_numpy()[games], players_per_game),
+    })
+    df['player_name'] = 'player ' + df['player_id'].astype(str)
+    return df.sort_values('game_id', kind='stable').head(n_rows).reset_index(drop=True)
+
+
+# Benchmark stages: each one reads and updates the shared `data` dict
+def _build_graph(data, chunksize=100_000):
+    builder = CoappearanceAccumulator(sorted_by_game=True)
+    df = data['appearances']
+    for start in range(0, len(df), chunksize):
+        builder.add(df.iloc[start:start + chunksize])
+    data['graph'] = builder.graph()
+
+
+def _components(data):
+    giant_component_csr(data['graph'])
+
+
+def _betweenness(data):
+    approximate_betweenness(data['graph'], max_sources=256, seed=0, processes=1)
+
+
+def _spectral(data):
+    spectral_centralities(data['graph'])
+
+
+def _diameter(data):
+    diameter(data['graph'])
+
+
+def _louvain(data):
+    detect_communities(data['graph'], cache_dir=None)
+
+
+def _percolation(data):
+    simulate_percolation(data['graph'], np.linspace(0.01, 1, 50), 10, seed=0, processes=1)
+
+
+def _null_models(data):
+    nodes, indptr, indices, _ = to_csr(data['graph'])
+    u, v = csr_edges(indptr, indices)
+    configuration_edges(np.diff(indptr), rng=0)
+    rewired_edges(u, v, len(nodes), rng=0, swaps_per_edge=1)
+
+
+STAGES = {
+    'build_graph': _build_graph,
+    'components': _components,
+    'betweenness': _betweenness,
+    'spectral': _spectral,
+    'diameter': _diameter,
+    'louvain': _louvain,
+    'percolation': _percolation,
+    'null_models': _null_models,
+}
+
+
+# Function to time one stage (wall and CPU time) and measure its peak Python/NumPy allocation
+def measure(func, data, memory=True):
+    if memory:
+        tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        func(data)
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+        if memory:
+            tracemalloc.stop()
+    return {'wall_s': wall, 'cpu_s': cpu, 'peak_mb': peak / 2 ** 20 if peak is not None else None}
+
+
+# Function to run the selected stages on synthetic data of every size
+def run_benchmark(sizes=DEFAULT_SIZES, stages=None, repeat=1, memory=True, seed=0, **generator_options):
+    """Return a list of records (size, stage, wall_s, cpu_s, peak_mb, nodes,
+    edges), keeping the fastest of `repeat` runs. The graph is always built
+    first since the other stages need it."""
+    stages = list(STAGES) if stages is None else ['build_graph'] + [s for s in stages if s != 'build_graph']
+    records = []
+    for size in sizes:
+        data = {'appearances': synthetic_appearances(size, seed=seed, **generator_options)}
+        for stage in stages:
+            runs = [measure(STAGES[stage], data, memory) for _ in range(repeat)]
+            best = min(runs, key=lambda run: run['wall_s'])
+            G = data['graph']
+            records.append({'size': size, 'stage': stage, **best,
+                            'nodes': G.number_of_nodes(), 'edges': G.number_of_edges()})
+            print(f"{size:>9} rows  {stage:<12} {best['wall_s']:8.3f} s", flush=True)
+    return records
+
+
+# Function to compare a run with a baseline file and list the stages that got slower
+def compare(records, baseline, tolerance=0.2):
+    reference = {(record['size'], record['stage']): record for record in baseline}
+    regressions = []
+    for record in records:
+        old = reference.get((record['size'], record['stage']))
+        if old and record['wall_s'] > old['wall_s'] * (1 + tolerance):
+            regressions.append({'size': record['size'], 'stage': record['stage'],
+                                'baseline_s': old['wall_s'], 'wall_s': record['wall_s'],
+                                'ratio': record['wall_s'] / old['wall_s']})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every analysis stage on synthetic co-appearance graphs")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="numbers of appearance rows")
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=None)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--no-memory', action='store_true', help="skip tracemalloc (faster, no peak_mb)")
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--baseline', default=None, help="previous output to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    # Options of synthetic_appearances
+    parser.add_argument('--competitions', type=int, default=None, help="fixed number of competitions "
+                        "(by default it grows with the size, so the graph does)")
+    parser.add_argument('--seasons', type=int, default=2, help="seasons covered when --competitions is not set")
+    parser.add_argument('--clubs-per-competition', type=int, default=20)
+    parser.add_argument('--squad-size', type=int, default=25)
+    parser.add_argument('--players-per-game', type=int, default=14)
+    parser.add_argument('--transfer-rate', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    records = run_benchmark(args.sizes, args.stages, args.repeat, memory=not args.no_memory, seed=args.seed,
+                            n_competitions=args.competitions, seasons=args.seasons,
+                            clubs_per_competition=args.clubs_per_competition, squad_size=args.squad_size,
+                            players_per_game=args.players_per_game, transfer_rate=args.transfer_rate)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'results': records}, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(records, json.load(f)['results'], args.tolerance)
+        for regression in regressions:
+            print(f"Slower: {regression['stage']} at {regression['size']} rows "
+                  f"({regression['baseline_s']:.3f} s -> {regression['wall_s']:.3f} s)")
+        if regressions:
+            raise SystemExit(1)
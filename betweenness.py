@@ -0,0 +1,141 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from csr import to_csr, neighbors_of
+
+
+# Function to get the dependencies delta_s(v) of one source (Brandes, unweighted, level by level)
+def source_dependencies(indptr, indices, source):
+    n = len(indptr) - 1
+    dist = np.full(n, -1, dtype=np.int64)
+    sigma = np.zeros(n, dtype=np.float64)
+    dist[source] = 0
+    sigma[source] = 1.0
+    frontier = np.array([source], dtype=np.int64)
+    levels = []
+    depth = 0
+    while len(frontier):
+        parents, children = neighbors_of(indptr, indices, frontier)
+        unseen = dist[children] == -1
+        new_nodes = np.unique(children[unseen])
+        dist[new_nodes] = depth + 1
+        # Shortest-path edges from this level to the next one
+        on_path = dist[children] == depth + 1
+        parents, children = parents[on_path], children[on_path]
+        sigma += np.bincount(children, weights=sigma[parents], minlength=n)
+        levels.append((parents, children))
+        frontier = new_nodes
+        depth += 1
+
+    delta = np.zeros(n, dtype=np.float64)
+    for parents, children in reversed(levels):
+        coefficients = sigma[parents] / sigma[children] * (1.0 + delta[children])
+        delta += np.bincount(parents, weights=coefficients, minlength=n)
+    delta[source] = 0.0
+    return delta
+
+
+def _chunk_dependencies(task):
+    indptr, indices, sources = task
+    total = np.zeros(len(indptr) - 1, dtype=np.float64)
+    squares = np.zeros(len(indptr) - 1, dtype=np.float64)
+    for source in sources:
+        delta = source_dependencies(indptr, indices, source)
+        total += delta
+        squares += delta * delta
+    return total, squares
+
+
+def _split(sources, n_chunks):
+    return [chunk for chunk in np.array_split(np.asarray(sources), n_chunks) if len(chunk)]
+
+
+def _scale(n, normalized):
+    # Same rescaling as nx.betweenness_centrality
+    if normalized:
+        return 1.0 / ((n - 1) * (n - 2)) if n > 2 else 1.0
+    return 0.5
+
+
+# Function to compute the exact betweenness with the sources spread over worker processes
+def betweenness_centrality(graph, normalized=True, processes=None, chunks_per_worker=4):
+    nodes, indptr, indices, _ = to_csr(graph)
+    n = len(nodes)
+    workers = processes or os.cpu_count() or 1
+    tasks = [(indptr, indices, chunk) for chunk in _split(np.arange(n), workers * chunks_per_worker)]
+    total = np.zeros(n, dtype=np.float64)
+    if workers == 1:
+        results = map(_chunk_dependencies, tasks)
+        for partial, _ in results:
+            total += partial
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for partial, _ in executor.map(_chunk_dependencies, tasks):
+                total += partial
+    return dict(zip(nodes, (total * _scale(n, normalized)).tolist()))
+
+
+# Function to estimate the betweenness from random sources until the top-k ranking is stable
+def approximate_betweenness(graph, top_k=5, tol=0.05, batch_size=None, max_sources=None,
+                            normalized=True, seed=None, processes=None):
+    """Sources are drawn without replacement in batches. After each batch the
+    estimate n/k * sum(delta_s) and its standard error are updated; sampling
+    stops when the top_k nodes are the same as after the previous batch and
+    their relative standard error is below tol.
+
+    Return a dict with 'betweenness' and 'stderr' (node -> value), the number of
+    sources used and whether the stopping rule was met."""
+    nodes, indptr, indices, _ = to_csr(graph)
+    n = len(nodes)
+    workers = processes or os.cpu_count() or 1
+    batch_size = batch_size or max(4 * workers, n // 50, 1)
+    max_sources = min(max_sources or n, n)
+    order = np.random.default_rng(seed).permutation(n)[:max_sources]
+    scale = _scale(n, normalized)
+
+    total = np.zeros(n, dtype=np.float64)
+    squares = np.zeros(n, dtype=np.float64)
+    used = 0
+    previous_top = None
+    converged = False
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while used < max_sources:
+            batch = order[used:used + batch_size]
+            tasks = [(indptr, indices, chunk) for chunk in _split(batch, workers)]
+            results = executor.map(_chunk_dependencies, tasks) if executor else map(_chunk_dependencies, tasks)
+            for partial, partial_squares in results:
+                total += partial
+                squares += partial_squares
+            used += len(batch)
+
+            estimate, stderr = _estimate(total, squares, used, n, scale)
+            top = set(np.argsort(-estimate, kind='stable')[:top_k].tolist())
+            top_index = np.fromiter(top, dtype=np.int64)
+            relative = stderr[top_index] / np.maximum(estimate[top_index], np.finfo(float).tiny)
+            if top == previous_top and relative.max(initial=0.0) <= tol:
+                converged = True
+                break
+            previous_top = top
+    finally:
+        if executor:
+            executor.shutdown()
+
+    estimate, stderr = _estimate(total, squares, used, n, scale)
+    return {
+        'betweenness': dict(zip(nodes, estimate.tolist())),
+        'stderr': dict(zip(nodes, stderr.tolist())),
+        'n_sources': used,
+        'converged': converged or used == n,
+    }
+
+
+def _estimate(total, squares, k, n, scale):
+    mean = total / k
+    variance = np.maximum(squares / k - mean * mean, 0.0)
+    # Finite population correction: the error is 0 once every source is used
+    correction = (n - k) / (n - 1) if n > 1 else 0.0
+    stderr = n * np.sqrt(variance / k * correction)
+    return n * mean * scale, stderr * scale
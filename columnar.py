@@ -0,0 +1,64 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+META_FILE = 'columns.json'
+
+
+# Function to write a DataFrame as one .npy file per column
+def save_columns(df, directory):
+    """Numeric columns are saved as they are; text and categorical columns
+    are saved as int32 codes with their categories kept in columns.json,
+    so every column can be memory-mapped back."""
+    os.makedirs(directory, exist_ok=True)
+    meta = {'columns': [], 'length': len(df)}
+    for position, column in enumerate(df.columns):
+        values = df[column]
+        entry = {'name': str(column), 'file': f'{position}.npy'}
+        if isinstance(values.dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(values.dtype):
+            categorical = pd.Categorical(values)
+            codes = categorical.codes.astype(np.int32)
+            entry['categories'] = [_to_json(category) for category in categorical.categories]
+            np.save(os.path.join(directory, entry['file']), codes)
+        else:
+            if values.hasnans and pd.api.types.is_integer_dtype(values.dtype):
+                values = values.astype(np.float64)
+            np.save(os.path.join(directory, entry['file']), values.to_numpy())
+        meta['columns'].append(entry)
+    with open(os.path.join(directory, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+def _to_json(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# Function to read the raw arrays of a directory written by save_columns
+def load_arrays(directory, mmap=True):
+    with open(os.path.join(directory, META_FILE), encoding='utf-8') as f:
+        meta = json.load(f)
+    arrays = {}
+    for entry in meta['columns']:
+        data = np.load(os.path.join(directory, entry['file']), mmap_mode='r' if mmap else None)
+        arrays[entry['name']] = (data, entry.get('categories'))
+    return arrays
+
+
+# Function to read back a DataFrame written by save_columns
+def load_columns(directory, columns=None, mmap=True):
+    arrays = load_arrays(directory, mmap=mmap)
+    data = {}
+    for name, (values, categories) in arrays.items():
+        if columns is not None and name not in columns:
+            continue
+        if categories is not None:
+            values = pd.Categorical.from_codes(np.asarray(values), categories=categories)
+        data[name] = values
+    return pd.DataFrame(data)
+
+
+# Function to check whether a directory holds a columnar table
+def has_columns(directory):
+    return os.path.exists(os.path.join(directory, META_FILE))
@@ -0,0 +1,76 @@
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from networkx.algorithms.community import louvain_communities, modularity
+
+from graph_cache import graph_fingerprint
+
+DEFAULT_CACHE_DIR = '.communities_cache'
+
+# Partitions already computed in this process, keyed by (fingerprint, seed, weight)
+_memory_cache = {}
+
+
+def _louvain(task):
+    G, seed, weight, resolution = task
+    communities = louvain_communities(G, weight=weight, resolution=resolution, seed=seed)
+    return communities, modularity(G, communities, weight=weight, resolution=resolution)
+
+
+def _result(communities, score, seed):
+    # Largest community first, so that colours and community ids are stable
+    communities = sorted((set(community) for community in communities), key=len, reverse=True)
+    partition = {node: i for i, community in enumerate(communities) for node in community}
+    return {
+        'partition': partition,
+        'communities': communities,
+        'sizes': np.array([len(community) for community in communities]),
+        'modularity': score,
+        'seed': seed,
+    }
+
+
+def _cache_path(cache_dir, key):
+    fingerprint, seed, weight, resolution = key
+    return os.path.join(cache_dir, f'{fingerprint}_{seed}_{weight}_{resolution}.pkl')
+
+
+# Function to detect the communities of a graph once, keeping the best partition over the seeds
+def detect_communities(G, seeds=(42,), weight='weight', resolution=1, processes=1, cache_dir=DEFAULT_CACHE_DIR):
+    """Run Louvain once per seed (in parallel when processes != 1) and return
+    the partition with the highest modularity as a dict with 'partition'
+    (node -> community id), 'communities', 'sizes', 'modularity' and 'seed'.
+
+    Each (graph fingerprint, seed) result is cached in memory and, unless
+    cache_dir is None, on disk, so the same graph is never partitioned twice.
+    """
+    fingerprint = graph_fingerprint(G, weight=weight or 'weight')
+    results = {}
+    missing = []
+    for seed in seeds:
+        key = (fingerprint, seed, weight, resolution)
+        if key in _memory_cache:
+            results[seed] = _memory_cache[key]
+        elif cache_dir and os.path.exists(_cache_path(cache_dir, key)):
+            with open(_cache_path(cache_dir, key), 'rb') as f:
+                results[seed] = _memory_cache[key] = pickle.load(f)
+        else:
+            missing.append(seed)
+
+    tasks = [(G, seed, weight, resolution) for seed in missing]
+    if processes == 1 or len(tasks) <= 1:
+        computed = map(_louvain, tasks)
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            computed = list(executor.map(_louvain, tasks))
+    for seed, (communities, score) in zip(missing, computed):
+        key = (fingerprint, seed, weight, resolution)
+        results[seed] = _memory_cache[key] = _result(communities, score, seed)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(_cache_path(cache_dir, key), 'wb') as f:
+                pickle.dump(results[seed], f)
+
+    return max((results[seed] for seed in seeds), key=lambda result: result['modularity'])
@@ -0,0 +1,169 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from columnar import save_columns, load_columns
+from csr import to_csr, undirected_to_csr, csr_edges, from_csr
+
+
+# Function to turn node ids into int64 player ids when they are all numeric (read_gexf gives strings)
+def player_id_array(ids):
+    ids = pd.Series(list(ids), dtype=object)
+    numeric = pd.to_numeric(ids, errors='coerce')
+    if len(ids) and numeric.notna().all() and (numeric == numeric.round()).all():
+        return numeric.to_numpy(np.int64)
+    return ids.to_numpy(object)
+
+
+def _weight_dtype(weights):
+    if len(weights) == 0 or (np.all(weights == np.round(weights)) and weights.min() >= 0):
+        return np.uint16 if len(weights) == 0 or weights.max() <= np.iinfo(np.uint16).max else np.uint32
+    return np.float32
+
+
+# Co-appearance graph stored as CSR arrays over dense int32 node indices
+class CompactGraph:
+    """player_ids[i] is the player of node i (sorted, so an id is found by
+    binary search), the neighbours of i are indices[indptr[i]:indptr[i + 1]]
+    with their weights (uint16 games played together, float32 for fractional
+    weights), and attributes holds one column per node attribute: numbers as
+    typed arrays, text as pandas Categoricals.
+
+    Every kernel reading graphs through csr.to_csr (spectral, betweenness,
+    distances, clustering...) accepts a CompactGraph as it is.
+    """
+
+    __slots__ = ('player_ids', 'indptr', 'indices', 'weights', 'attributes')
+
+    def __init__(self, player_ids, indptr, indices, weights, attributes=None):
+        self.player_ids = player_ids
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.attributes = attributes if attributes is not None else {}
+
+    # Function to build the graph from an edge table (player1, player2, weight), e.g. CoappearanceAccumulator.edges()
+    @classmethod
+    def from_edges(cls, player1, player2, weights=None, player_ids=None):
+        player1, player2 = player_id_array(player1), player_id_array(player2)
+        ids = np.unique(np.concatenate([player1, player2]) if player_ids is None
+                        else np.concatenate([player1, player2, player_id_array(player_ids)]))
+        u = np.searchsorted(ids, player1)
+        v = np.searchsorted(ids, player2)
+        weights = np.ones(len(u)) if weights is None else np.asarray(weights, dtype=np.float64)
+        indptr, indices, csr_weights = undirected_to_csr(u, v, len(ids), weights)
+        return cls(ids, indptr, indices.astype(np.int32), csr_weights.astype(_weight_dtype(csr_weights)))
+
+    @classmethod
+    def from_edge_table(cls, edges, names=None):
+        G = cls.from_edges(edges['player1'], edges['player2'], edges['weight'])
+        if names is not None:
+            G.set_attribute('name', names)
+        return G
+
+    @classmethod
+    def from_networkx(cls, G, weight='weight', attributes=('name', 'performance', 'nationality')):
+        nodes, indptr, indices, weights = to_csr(G, weight=weight)
+        ids = player_id_array(nodes)
+        order = np.argsort(ids, kind='stable')
+        if np.any(order != np.arange(len(order))):
+            # Renumber the nodes in player id order
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order))
+            u, v, w = csr_edges(indptr, indices, weights)
+            indptr, indices, weights = undirected_to_csr(rank[u], rank[v], len(order), w)
+            ids = ids[order]
+            nodes = [nodes[i] for i in order]
+        compact = cls(ids, indptr, indices.astype(np.int32), np.asarray(weights).astype(_weight_dtype(weights)))
+        for attribute in attributes:
+            values = [G.nodes[node].get(attribute) for node in nodes]
+            if any(value is not None for value in values):
+                compact.set_attribute(attribute, values)
+        return compact
+
+    def to_networkx(self, weight='weight', attributes=True):
+        node_attributes = None
+        if attributes and self.attributes:
+            node_attributes = {name: [None if pd.isna(value) else value for value in self.attribute(name).tolist()]
+                               for name in self.attributes}
+        weights = self.weights.astype(np.float64) if self.weights.dtype.kind == 'f' else self.weights.astype(np.int64)
+        return from_csr(self.player_ids.tolist(), self.indptr, self.indices, weights, node_attributes, weight=weight)
+
+    # Function to store a node attribute, given in node order or as a Series indexed by player_id
+    def set_attribute(self, name, values):
+        if isinstance(values, pd.Series):
+            values = values.reindex(self.player_ids)
+        values = pd.Series(list(values) if not isinstance(values, pd.Series) else values.to_numpy())
+        numeric = pd.to_numeric(values, errors='coerce')
+        if values.notna().sum() and numeric.notna().sum() == values.notna().sum():
+            if numeric.notna().all() and (numeric == numeric.round()).all():
+                self.attributes[name] = numeric.to_numpy(np.int32 if numeric.abs().max() < 2 ** 31 else np.int64)
+            else:
+                self.attributes[name] = numeric.to_numpy(np.float32)
+        else:
+            self.attributes[name] = pd.Categorical(values)
+
+    def attribute(self, name):
+        return np.asarray(self.attributes[name])
+
+    # Function to get the dense indices of player ids (-1 when absent)
+    def index_of(self, player_ids):
+        player_ids = player_id_array(np.atleast_1d(player_ids))
+        positions = np.searchsorted(self.player_ids, player_ids)
+        positions = np.minimum(positions, max(len(self.player_ids) - 1, 0))
+        found = len(self.player_ids) > 0
+        return np.where(found & (self.player_ids[positions] == player_ids), positions, -1)
+
+    def neighbors(self, player_id):
+        i = int(self.index_of(player_id)[0])
+        if i < 0:
+            raise KeyError(player_id)
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.player_ids[self.indices[start:end]], self.weights[start:end]
+
+    def number_of_nodes(self):
+        return len(self.player_ids)
+
+    def number_of_edges(self):
+        rows = np.repeat(np.arange(len(self.indptr) - 1), np.diff(self.indptr))
+        return int((rows <= self.indices).sum())
+
+    def degree(self):
+        return pd.Series(np.diff(self.indptr), index=self.player_ids)
+
+    def strength(self):
+        rows = np.repeat(np.arange(len(self.indptr) - 1), np.diff(self.indptr))
+        return pd.Series(np.bincount(rows, weights=self.weights, minlength=self.number_of_nodes()), index=self.player_ids)
+
+    # CSR arrays in the format of csr.to_csr, used by the analysis kernels
+    def csr_arrays(self, weight='weight'):
+        weights = np.ones(len(self.indices)) if weight is None else self.weights.astype(np.float64)
+        return self.player_ids.tolist(), self.indptr, self.indices, weights
+
+    def nbytes(self):
+        total = self.player_ids.nbytes + self.indptr.nbytes + self.indices.nbytes + self.weights.nbytes
+        for values in self.attributes.values():
+            total += values.nbytes
+        return total
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ('indptr', 'indices', 'weights'):
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+        nodes = pd.DataFrame({'player_id': self.player_ids, **self.attributes})
+        save_columns(nodes, os.path.join(directory, 'nodes'))
+        with open(os.path.join(directory, 'graph.json'), 'w', encoding='utf-8') as f:
+            json.dump({'attributes': list(self.attributes)}, f)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        arrays = [np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r' if mmap else None)
+                  for name in ('indptr', 'indices', 'weights')]
+        with open(os.path.join(directory, 'graph.json'), encoding='utf-8') as f:
+            names = json.load(f)['attributes']
+        nodes = load_columns(os.path.join(directory, 'nodes'), mmap=mmap)
+        attributes = {name: nodes[name].array if isinstance(nodes[name].dtype, pd.CategoricalDtype)
+                      else nodes[name].to_numpy() for name in names}
+        return cls(player_id_array(nodes['player_id']), *arrays, attributes)
@@ -0,0 +1,9 @@
+import os
+
+# Directory holding the Transfermarkt CSV files and the GEXF network (FOOTBALL_DATA_DIR overrides it)
+DATA_DIR = os.environ.get('FOOTBALL_DATA_DIR', 'reseaux_complexes')
+
+
+# Function to get the path of a file of the data directory
+def data_path(name):
+    return os.path.join(DATA_DIR, name)
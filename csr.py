@@ -0,0 +1,91 @@
+import numpy as np
+import networkx as nx
+
+
+# Function to convert a networkx graph to CSR arrays (both directions of every edge)
+def to_csr(G, weight='weight', nodes=None):
+    """Return (nodes, indptr, indices, weights) where the neighbours of the
+    i-th node are indices[indptr[i]:indptr[i + 1]], sorted by index."""
+    # Graphs already stored as CSR arrays (compact_graph.CompactGraph) are returned as they are
+    if nodes is None and hasattr(G, 'csr_arrays'):
+        return G.csr_arrays(weight)
+    nodes = list(G.nodes()) if nodes is None else list(nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    n_edges = G.number_of_edges()
+    rows = np.empty(2 * n_edges, dtype=np.int64)
+    cols = np.empty(2 * n_edges, dtype=np.int64)
+    weights = np.empty(2 * n_edges, dtype=np.float64)
+    k = 0
+    edges = G.edges(data=weight, default=1) if weight else ((u, v, 1) for u, v in G.edges())
+    for u, v, w in edges:
+        if u not in index or v not in index:
+            continue
+        rows[k], cols[k], weights[k] = index[u], index[v], w
+        k += 1
+        if u != v:
+            rows[k], cols[k], weights[k] = index[v], index[u], w
+            k += 1
+    return (nodes,) + edges_to_csr(rows[:k], cols[:k], weights[:k], len(nodes))
+
+
+# Function to sort a directed edge list into CSR arrays
+def edges_to_csr(rows, cols, weights, n_nodes):
+    order = np.lexsort((cols, rows))
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_nodes), out=indptr[1:])
+    return indptr, np.asarray(cols)[order].astype(np.int32), np.asarray(weights)[order]
+
+
+# Function to symmetrize an undirected edge list (u, v) into CSR arrays
+def undirected_to_csr(u, v, n_nodes, weights=None):
+    u = np.asarray(u, dtype=np.int64)
+    v = np.asarray(v, dtype=np.int64)
+    if weights is None:
+        weights = np.ones(len(u), dtype=np.float64)
+    loops = u == v
+    rows = np.concatenate([u, v[~loops]])
+    cols = np.concatenate([v, u[~loops]])
+    return edges_to_csr(rows, cols, np.concatenate([weights, np.asarray(weights)[~loops]]), n_nodes)
+
+
+# Function to get the undirected edge list (u <= v) back from CSR arrays
+def csr_edges(indptr, indices, weights=None):
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    keep = rows <= indices
+    if weights is None:
+        return rows[keep], np.asarray(indices)[keep]
+    return rows[keep], np.asarray(indices)[keep], np.asarray(weights)[keep]
+
+
+# Function to build a networkx graph from CSR arrays
+def from_csr(nodes, indptr, indices, weights=None, node_attributes=None, weight='weight'):
+    G = nx.Graph()
+    if node_attributes:
+        names = list(node_attributes)
+        columns = [node_attributes[name] for name in names]
+        G.add_nodes_from(
+            (node, {name: value for name, value in zip(names, values) if value is not None})
+            for node, values in zip(nodes, zip(*columns))
+        )
+    else:
+        G.add_nodes_from(nodes)
+    nodes = list(nodes)
+    if weights is None:
+        u, v = csr_edges(indptr, indices)
+        G.add_edges_from((nodes[a], nodes[b]) for a, b in zip(u.tolist(), v.tolist()))
+    else:
+        u, v, w = csr_edges(indptr, indices, weights)
+        G.add_edges_from((nodes[a], nodes[b], {weight: c}) for a, b, c in zip(u.tolist(), v.tolist(), w.tolist()))
+    return G
+
+
+# Function to gather the neighbours of several nodes at once
+def neighbors_of(indptr, indices, nodes):
+    starts = indptr[nodes]
+    counts = indptr[np.asarray(nodes) + 1] - starts
+    if counts.sum() == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # Position of every neighbour in indices, built without a Python loop
+    offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts)
+    positions = np.arange(counts.sum()) + offsets
+    return np.repeat(np.asarray(nodes), counts), np.asarray(indices)[positions].astype(np.int64)
@@ -0,0 +1,226 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+from csr import to_csr, neighbors_of
+from instrumentation import count
+
+
+# Function to restrict the graph to its largest connected component, as CSR arrays
+def giant_component_csr(graph):
+    nodes, indptr, indices, weights = to_csr(graph)
+    n = len(nodes)
+    A = sp.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(n, n))
+    _, labels = connected_components(A, directed=False)
+    giant = np.flatnonzero(labels == np.argmax(np.bincount(labels)))
+    sub = A[giant][:, giant].tocsr()
+    sub.sort_indices()
+    return [nodes[i] for i in giant], sub.indptr.astype(np.int64), sub.indices.astype(np.int32)
+
+
+# Function to get the BFS distances from one source (-1 for unreachable nodes)
+def bfs_distances(indptr, indices, source):
+    count('bfs')
+    dist = np.full(len(indptr) - 1, -1, dtype=np.int64)
+    dist[source] = 0
+    frontier = np.array([source], dtype=np.int64)
+    depth = 0
+    while len(frontier):
+        _, children = neighbors_of(indptr, indices, frontier)
+        children = np.unique(children[dist[children] == -1])
+        depth += 1
+        dist[children] = depth
+        frontier = children
+    return dist
+
+
+# Function to get the eccentricity of several nodes at once
+def _eccentricities(indptr, indices, sources):
+    return np.array([bfs_distances(indptr, indices, source).max() for source in sources], dtype=np.int64)
+
+
+# Function to compute the exact diameter of a connected graph with iFUB
+def ifub_diameter(indptr, indices, max_bfs=None):
+    """iFUB (Crescenzi et al.): BFS from a central node u picked by a double
+    sweep, then compute the eccentricities of the BFS levels of u from the
+    deepest one up, stopping as soon as the lower bound beats 2 * (level - 1).
+    Usually only a few BFS are needed instead of one per node. Return None
+    when the bounds would need more than max_bfs BFS."""
+    n = len(indptr) - 1
+    if n <= 1:
+        return 0
+    degrees = np.diff(indptr)
+    # Double sweep from the highest degree node, u is the middle of the a-b path found
+    start = int(np.argmax(degrees))
+    a = int(np.argmax(bfs_distances(indptr, indices, start)))
+    dist_a = bfs_distances(indptr, indices, a)
+    b = int(np.argmax(dist_a))
+    dist_b = bfs_distances(indptr, indices, b)
+    length = dist_a[b]
+    middle = np.flatnonzero((dist_a == length // 2) & (dist_b == length - length // 2))
+    u = int(middle[0]) if len(middle) else start
+
+    dist_u = bfs_distances(indptr, indices, u)
+    level = int(dist_u.max())
+    lower = max(level, int(length))
+    upper = 2 * level
+    n_bfs = 4
+    while upper > lower:
+        fringe = np.flatnonzero(dist_u == level)
+        n_bfs += len(fringe)
+        if max_bfs is not None and n_bfs > max_bfs:
+            return None
+        fringe_ecc = int(_eccentricities(indptr, indices, fringe).max())
+        if max(lower, fringe_ecc) > 2 * (level - 1):
+            return max(lower, fringe_ecc)
+        lower = max(lower, fringe_ecc)
+        upper = 2 * (level - 1)
+        level -= 1
+    return lower
+
+
+# Function to compute the exact diameter of the giant component
+def diameter(graph, max_bfs=None, processes=None):
+    """iFUB first; when its bounds do not prune (more than max_bfs BFS, by
+    default a tenth of the nodes: a source of the batched all-pairs sweep
+    costs about a tenth of a single BFS), the diameter is read from the
+    distance histogram instead."""
+    _, indptr, indices = giant_component_csr(graph)
+    n = len(indptr) - 1
+    result = ifub_diameter(indptr, indices, max(64, n // 10) if max_bfs is None else max_bfs)
+    if result is None:
+        result = len(_distance_histogram(indptr, indices, processes)) - 1
+    return result
+
+
+def _batch_histogram(task):
+    indptr, indices, sources = task
+    n = len(indptr) - 1
+    A = sp.csr_matrix((np.ones(len(indices), dtype=np.float32), indices, indptr), shape=(n, n))
+    # One column per source: the BFS of every source advances with one sparse product per level
+    visited = np.zeros((n, len(sources)), dtype=bool)
+    visited[sources, np.arange(len(sources))] = True
+    frontier = visited.astype(np.float32)
+    histogram = [0]
+    while True:
+        reached = (A @ frontier > 0) & ~visited
+        n_reached = int(reached.sum())
+        if n_reached == 0:
+            return np.array(histogram, dtype=np.int64)
+        histogram.append(n_reached)
+        visited |= reached
+        frontier = reached.astype(np.float32)
+
+
+# Function to compute the shortest-path length histogram of the giant component
+def distance_distribution(graph, processes=None, batch_size=64):
+    """Return (histogram, average_path_length): histogram[d] is the number of
+    unordered pairs of nodes at distance d in the giant component."""
+    _, indptr, indices = giant_component_csr(graph)
+    histogram = _distance_histogram(indptr, indices, processes, batch_size)
+    pairs = histogram.sum()
+    average = float((np.arange(len(histogram)) * histogram).sum() / pairs) if pairs else 0.0
+    return histogram, average
+
+
+# Function to count the unordered pairs at every distance of a connected graph, with batched BFS
+def _distance_histogram(indptr, indices, processes=None, batch_size=64):
+    n = len(indptr) - 1
+    batches = [(indptr, indices, sources) for sources in np.array_split(np.arange(n), max(1, n // batch_size))]
+    workers = processes or os.cpu_count() or 1
+    if workers == 1:
+        parts = list(map(_batch_histogram, batches))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_batch_histogram, batches))
+    histogram = np.zeros(max(len(part) for part in parts), dtype=np.int64)
+    for part in parts:
+        histogram[:len(part)] += part
+    # Every unordered pair was reached from both ends
+    histogram //= 2
+    return histogram
+
+
+# Function to merge the counters of every node with those of its neighbours (register-wise maximum)
+def _union_neighbours(registers, indptr, indices, block_edges):
+    n = len(indptr) - 1
+    updated = registers.copy()
+    start = 0
+    while start < n:
+        # As many nodes as fit in block_edges neighbour rows (at least one), so the gathered
+        # block stays block_edges x m bytes instead of 2E x m for the whole graph
+        end = int(np.searchsorted(indptr, indptr[start] + block_edges, side='right')) - 1
+        end = min(max(end, start + 1), n)
+        rows = registers[indices[indptr[start]:indptr[end]]]
+        # Every node of the giant component has a neighbour, so no reduceat segment is empty
+        np.maximum(updated[start:end], np.maximum.reduceat(rows, indptr[start:end] - indptr[start], axis=0),
+                   out=updated[start:end])
+        start = end
+    return updated
+
+
+# Function to approximate the neighbourhood function with HyperANF (HyperLogLog counters)
+def hyperanf(graph, log2_registers=6, max_iter=1000, seed=None, block_edges=1 << 18):
+    """Return a dict with the estimated number of ordered pairs within distance
+    t ('neighbourhood_function', t = 0, 1, ...), the distance histogram of
+    unordered pairs, the average path length and the effective diameter (90th
+    percentile). Only the giant component is used. The relative standard error
+    of each counter is about 1.04 / sqrt(2 ** log2_registers). The counters
+    of the neighbours are gathered block_edges edges at a time."""
+    _, indptr, indices = giant_component_csr(graph)
+    n = len(indptr) - 1
+    if n < 2:
+        return {'neighbourhood_function': np.array([float(n)]), 'histogram': np.zeros(1),
+                'average_path_length': 0.0, 'effective_diameter': 0, 'diameter_lower_bound': 0}
+    m = 1 << log2_registers
+    rng = np.random.default_rng(seed)
+
+    # One random 64-bit hash per node: the low bits pick a register, the rest give the rank
+    hashes = rng.integers(0, np.iinfo(np.int64).max, size=n, dtype=np.int64).astype(np.uint64)
+    register = (hashes & np.uint64(m - 1)).astype(np.int64)
+    rest = hashes >> np.uint64(log2_registers)
+    rank = np.ones(n, dtype=np.uint8)
+    bits = 64 - log2_registers
+    for _ in range(bits - 1):
+        unset = (rest & np.uint64(1)) == 0
+        if not unset.any():
+            break
+        rank[unset] += 1
+        rest[unset] >>= np.uint64(1)
+    registers = np.zeros((n, m), dtype=np.uint8)
+    registers[np.arange(n), register] = rank
+
+    alpha = 0.7213 / (1 + 1.079 / m)
+
+    def estimate(values):
+        raw = alpha * m * m / np.power(2.0, -values.astype(np.float64)).sum(axis=1)
+        zeros = (values == 0).sum(axis=1)
+        small = (raw <= 2.5 * m) & (zeros > 0)
+        raw[small] = m * np.log(m / zeros[small])
+        return raw.sum()
+
+    neighbourhood = [estimate(registers)]
+    for _ in range(max_iter):
+        updated = _union_neighbours(registers, indptr, indices, block_edges)
+        if np.array_equal(updated, registers):
+            break
+        registers = updated
+        neighbourhood.append(estimate(registers))
+
+    neighbourhood = np.maximum.accumulate(np.array(neighbourhood))
+    histogram = np.diff(neighbourhood) / 2
+    pairs = histogram.sum()
+    distances = np.arange(1, len(histogram) + 1)
+    average = float((distances * histogram).sum() / pairs) if pairs else 0.0
+    cumulative = np.cumsum(histogram) / pairs if pairs else np.zeros(0)
+    effective = int(distances[np.searchsorted(cumulative, 0.9)]) if pairs else 0
+    return {
+        'neighbourhood_function': neighbourhood,
+        'histogram': np.concatenate([[0.0], histogram]),
+        'average_path_length': average,
+        'effective_diameter': effective,
+        'diameter_lower_bound': len(histogram),
+    }
@@ -0,0 +1,82 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+from instrumentation import record_error, collect_errors
+from metrics import calculate_metrics
+from null_models import er_edges, configuration_edges, rewired_edges, to_graph
+
+
+# Null-model generators: each one builds a replica from its own seed
+def er_replica(seed, n, p):
+    return to_graph(n, *er_edges(n, p, seed))
+
+
+def configuration_replica(seed, degree_sequence):
+    return to_graph(len(degree_sequence), *configuration_edges(degree_sequence, seed))
+
+
+# Exact simple-graph null model: the reference edges (u, v) rewired by degree-preserving swaps
+def rewired_replica(seed, u, v, n_nodes, swaps_per_edge=10):
+    return to_graph(n_nodes, *rewired_edges(u, v, n_nodes, seed, swaps_per_edge))
+
+
+# Function to derive independent, reproducible seeds for every replica
+def replica_seeds(n_replicas, seed=42):
+    children = np.random.SeedSequence(seed).spawn(n_replicas)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+
+def _run_replica(task):
+    generator, params, seed, metrics_func = task
+    # Errors handled by metrics_func travel back with the result (a worker has no stage to record them in)
+    with collect_errors() as errors:
+        result = metrics_func(generator(seed, **params))
+    return result, errors
+
+
+# Function to generate n_replicas null-model graphs and compute their metrics in parallel
+def run_ensemble(generator, params, n_replicas, metrics_func=calculate_metrics, seed=42, processes=None):
+    """Return the list of metric dicts, one per replica, in seed order.
+
+    generator and metrics_func must be module-level functions so they can be
+    sent to the worker processes; processes=1 runs everything in this process.
+    The result does not depend on the number of processes.
+    """
+    tasks = [(generator, params, replica_seed, metrics_func) for replica_seed in replica_seeds(n_replicas, seed)]
+    if processes == 1:
+        outputs = [_run_replica(task) for task in tasks]
+    else:
+        workers = processes or os.cpu_count() or 1
+        chunksize = max(1, n_replicas // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outputs = list(executor.map(_run_replica, tasks, chunksize=chunksize))
+    for _, errors in outputs:
+        for error in errors:
+            record_error(error)
+    return [result for result, _ in outputs]
+
+
+# Function to get the mean, standard deviation and confidence interval of every metric
+def summarize(metrics_list, confidence=0.95):
+    valid = [metrics for metrics in metrics_list if metrics]
+    if not valid:
+        return {}
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    summary = {}
+    for key in valid[0]:
+        values = np.array([metrics[key] for metrics in valid], dtype=float)
+        mean = values.mean()
+        std = values.std(ddof=1) if len(values) > 1 else 0.0
+        half_width = z * std / math.sqrt(len(values))
+        summary[key] = {
+            'mean': mean,
+            'std': std,
+            'ci_low': mean - half_width,
+            'ci_high': mean + half_width,
+            'n': len(values),
+        }
+    return summary
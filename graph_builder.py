@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import networkx as nx
+
+# Columns needed to build the co-appearance graph
+REQUIRED_COLUMNS = {'game_id', 'player_id', 'player_name', 'player_club'}
+
+
+# Function to list every pair of rows sharing the same (club, game)
+def _group_pairs(group_starts, group_sizes):
+    left_parts = []
+    right_parts = []
+    # Groups of the same size share the same upper-triangle pattern
+    for size in np.unique(group_sizes):
+        if size < 2:
+            continue
+        starts = group_starts[group_sizes == size]
+        i, j = np.triu_indices(size, k=1)
+        left_parts.append((starts[:, None] + i[None, :]).ravel())
+        right_parts.append((starts[:, None] + j[None, :]).ravel())
+    if not left_parts:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    return np.concatenate(left_parts), np.concatenate(right_parts)
+
+
+# Function to compute the weighted edge list of the co-appearance graph
+def coappearance_edges(df, club_col='player_club', game_col='game_id', player_col='player_id'):
+    """Return a DataFrame (player1, player2, weight) with player1 <= player2.
+
+    The weight of a pair is the number of (club, game) groups in which both
+    players appear, exactly as the pairwise loop in projet.py counts it.
+    """
+    keys = df[[club_col, game_col, player_col]]
+    keys = keys.sort_values([club_col, game_col], kind='stable')
+    players = keys[player_col].to_numpy()
+
+    # Boundaries of the (club, game) groups in the sorted table
+    club_codes = pd.factorize(keys[club_col])[0]
+    game_codes = pd.factorize(keys[game_col])[0]
+    new_group = np.ones(len(keys), dtype=bool)
+    if len(keys) > 1:
+        new_group[1:] = (club_codes[1:] != club_codes[:-1]) | (game_codes[1:] != game_codes[:-1])
+    group_starts = np.flatnonzero(new_group)
+    group_sizes = np.diff(np.append(group_starts, len(keys)))
+
+    left, right = _group_pairs(group_starts, group_sizes)
+    p1 = players[left]
+    p2 = players[right]
+    pairs = pd.DataFrame({'player1': np.minimum(p1, p2), 'player2': np.maximum(p1, p2)})
+
+    edges = pairs.groupby(['player1', 'player2'], sort=False).size().reset_index(name='weight')
+    edges['weight'] = edges['weight'].astype(np.int64)
+    return edges
+
+
+# Function to get one name per player (the last one seen, like the original loop)
+def player_names(df, player_col='player_id', name_col='player_name'):
+    names = df[[player_col, name_col]].drop_duplicates(player_col, keep='last')
+    return pd.Series(names[name_col].to_numpy(), index=names[player_col].to_numpy())
+
+
+# Function to build the player co-appearance graph from an appearances table
+def build_coappearance_graph(df):
+    if not REQUIRED_COLUMNS.issubset(df.columns):
+        raise ValueError(f"Your file must contain the columns {REQUIRED_COLUMNS}")
+
+    edges = coappearance_edges(df)
+    G = nx.Graph()
+    G.add_weighted_edges_from(edges.itertuples(index=False, name=None))
+
+    # Assign node names once per player
+    names = player_names(df)
+    nx.set_node_attributes(G, names.reindex(list(G.nodes())).to_dict(), 'name')
+    return G
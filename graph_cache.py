@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import networkx as nx
+
+from columnar import save_columns, load_columns
+from config import data_path
+from csr import to_csr, from_csr
+
+# CSV files the football network is built from; a change in any of them invalidates the cache
+DEFAULT_SOURCES = (
+    data_path('appearances_reduced.csv'),
+    data_path('players.csv'),
+    data_path('games.csv'),
+)
+
+NODE_ATTRIBUTES = ('name', 'performance', 'nationality')
+CACHE_VERSION = 1
+
+
+# Function to fingerprint the files the cache depends on (size and modification time)
+def file_fingerprint(paths):
+    fingerprint = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint[os.path.abspath(path)] = [stat.st_size, stat.st_mtime_ns]
+        except FileNotFoundError:
+            fingerprint[os.path.abspath(path)] = None
+    return fingerprint
+
+
+def cache_dir_for(gexf_path):
+    return gexf_path + '.cache'
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'meta.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+# Function to write the CSR arrays and the node attribute columns of a graph
+def write_cache(G, cache_dir, fingerprint):
+    if os.path.exists(cache_dir):
+        shutil.rmtree(cache_dir)
+    os.makedirs(cache_dir)
+    nodes, indptr, indices, weights = to_csr(G)
+    np.save(os.path.join(cache_dir, 'indptr.npy'), indptr)
+    np.save(os.path.join(cache_dir, 'indices.npy'), indices)
+    np.save(os.path.join(cache_dir, 'weights.npy'), weights)
+
+    attributes = {'id': pd.Series(nodes, dtype=object)}
+    for attribute in NODE_ATTRIBUTES:
+        values = pd.Series([G.nodes[node].get(attribute) for node in nodes], dtype=object)
+        attributes[attribute] = pd.to_numeric(values, errors='coerce') if attribute == 'performance' else values
+    save_columns(pd.DataFrame(attributes), os.path.join(cache_dir, 'nodes'))
+
+    # The meta file is written last, so an interrupted write leaves an invalid cache
+    with open(os.path.join(cache_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'version': CACHE_VERSION, 'sources': fingerprint}, f)
+
+
+# Function to load the graph arrays, rebuilding the cache from the GEXF when it is stale
+def load_csr(gexf_path, sources=DEFAULT_SOURCES):
+    """Return a dict with the memory-mapped CSR arrays (indptr, indices,
+    weights) and the node columns (id, name, performance, nationality)."""
+    cache_dir = cache_dir_for(gexf_path)
+    fingerprint = file_fingerprint((gexf_path,) + tuple(sources))
+    meta = _read_meta(cache_dir)
+    if meta is None or meta.get('version') != CACHE_VERSION or meta.get('sources') != fingerprint:
+        write_cache(nx.read_gexf(gexf_path), cache_dir, fingerprint)
+
+    arrays = {name: np.load(os.path.join(cache_dir, f'{name}.npy'), mmap_mode='r')
+              for name in ('indptr', 'indices', 'weights')}
+    arrays['nodes'] = load_columns(os.path.join(cache_dir, 'nodes'))
+    return arrays
+
+
+# Function to load the football network as a networkx graph through the cache
+def load_graph(gexf_path, sources=DEFAULT_SOURCES):
+    arrays = load_csr(gexf_path, sources)
+    nodes = arrays['nodes']
+    attributes = {}
+    for attribute in NODE_ATTRIBUTES:
+        if attribute not in nodes.columns:
+            continue
+        values = nodes[attribute].astype(object).where(nodes[attribute].notna(), None)
+        if attribute == 'performance':
+            values = [None if value is None or np.isnan(value) else int(value) for value in values]
+        attributes[attribute] = list(values)
+    return from_csr(list(nodes['id'].astype(str)), arrays['indptr'], arrays['indices'], arrays['weights'],
+                    node_attributes=attributes)
+
+
+# Function to fingerprint the content of a graph (nodes, edges and weights)
+def graph_fingerprint(G, weight='weight'):
+    nodes, indptr, indices, weights = to_csr(G, weight=weight)
+    digest = hashlib.sha256()
+    digest.update('\n'.join(repr(node) for node in nodes).encode('utf-8'))
+    for array in (indptr, indices, weights):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,121 @@
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from csr import to_csr, csr_edges
+from ensemble import run_ensemble, summarize
+from null_models import configuration_edges
+
+
+# Function to encode an attribute as integer codes (-1 for missing values)
+def encode_attribute(values):
+    codes, categories = pd.factorize(pd.Series(values), sort=True)
+    return codes.astype(np.int32), list(categories)
+
+
+# Function to split a numeric attribute (e.g. performance) into quantile buckets
+def performance_buckets(values, n_buckets=4):
+    values = pd.Series(values, dtype=float)
+    return pd.qcut(values.rank(method='first'), n_buckets, labels=False).fillna(-1).astype(np.int32).to_numpy()
+
+
+# Function to encode several node attributes, in node order, from the graph or a player store
+def node_attribute_codes(G, attributes, nodes=None, store=None):
+    """attributes is a list of names, read from the store columns when a store
+    (player_store.build_player_store) is given, otherwise from the node data
+    (the attribute columns of a compact_graph.CompactGraph).
+    Return ({name: codes}, {name: categories})."""
+    compact = hasattr(G, 'csr_arrays')
+    if nodes is None:
+        nodes = G.player_ids.tolist() if compact else list(G.nodes())
+    nodes = list(nodes)
+    codes, categories = {}, {}
+    for name in attributes:
+        if store is not None:
+            values = store[name].reindex(nodes).to_numpy()
+        elif compact:
+            values = G.attribute(name)[G.index_of(nodes)] if name in G.attributes else [None] * len(nodes)
+        else:
+            values = [G.nodes[node].get(name) for node in nodes]
+        codes[name], categories[name] = encode_attribute(values)
+    return codes, categories
+
+
+# Function to get the symmetric mixing matrix e[a, b] (fraction of edge ends joining a and b)
+def mixing_matrix(u, v, codes, n_categories=None, weights=None):
+    a, b = codes[u], codes[v]
+    known = (a >= 0) & (b >= 0)
+    a, b = a[known], b[known]
+    w = np.ones(len(a)) if weights is None else np.asarray(weights, dtype=float)[known]
+    k = int(codes.max()) + 1 if n_categories is None else n_categories
+    k = max(k, 1)
+    # Each undirected edge counts in both directions, as in nx.attribute_mixing_matrix
+    counts = np.bincount(a * k + b, weights=w, minlength=k * k) + np.bincount(b * k + a, weights=w, minlength=k * k)
+    total = counts.sum()
+    return (counts / total if total else counts).reshape(k, k)
+
+
+def _assortativity(matrix):
+    a = matrix.sum(axis=1)
+    expected = (a * a).sum()
+    if expected == 1:
+        return np.nan
+    return (np.trace(matrix) - expected) / (1 - expected)
+
+
+# Function to compute the homophily and assortativity of every attribute in one pass over the edges
+def attribute_homophily(u, v, codes, weights=None):
+    """u, v are the edge end indices and codes a {name: integer codes} dict.
+    Edges with a missing value at either end are left out. Return
+    {name: {'homophily', 'weighted_homophily', 'assortativity',
+    'weighted_assortativity'}}."""
+    results = {}
+    for name, values in codes.items():
+        a, b = values[u], values[v]
+        known = (a >= 0) & (b >= 0)
+        same = (a == b) & known
+        result = {
+            'homophily': same.sum() / known.sum() if known.any() else np.nan,
+            'assortativity': _assortativity(mixing_matrix(u, v, values)),
+        }
+        if weights is not None:
+            w = np.asarray(weights, dtype=float)
+            result['weighted_homophily'] = w[same].sum() / w[known].sum() if known.any() else np.nan
+            result['weighted_assortativity'] = _assortativity(mixing_matrix(u, v, values, weights=w))
+        results[name] = result
+    return results
+
+
+# Null-model replica given as an edge list, without building a networkx graph
+def configuration_pairs(seed, degree_sequence):
+    return configuration_edges(degree_sequence, seed)
+
+
+def _replica_homophily(pairs, codes):
+    u, v = pairs
+    return {name: result['homophily'] for name, result in attribute_homophily(u, v, codes).items()}
+
+
+# Function to build the homophily report of a graph, with z-scores against configuration-model replicas
+def homophily_report(G, attributes, store=None, weight='weight', n_replicas=0, seed=42, processes=None):
+    """Return a DataFrame indexed by attribute with the (weighted) homophily
+    and assortativity. With n_replicas > 0 the homophily is also compared
+    with configuration-model graphs of the same degree sequence, in which the
+    players keep their attributes: null_mean, null_std and z_score."""
+    nodes, indptr, indices, weights = to_csr(G, weight=weight)
+    u, v, w = csr_edges(indptr, indices, weights)
+    loops = u != v
+    u, v, w = u[loops], v[loops], w[loops]
+    codes, _ = node_attribute_codes(G, attributes, nodes=nodes, store=store)
+    report = pd.DataFrame(attribute_homophily(u, v, codes, weights=w if weight else None)).T
+
+    if n_replicas > 0:
+        degrees = np.bincount(np.concatenate([u, v]), minlength=len(nodes))
+        replicas = run_ensemble(configuration_pairs, {'degree_sequence': degrees}, n_replicas,
+                                metrics_func=partial(_replica_homophily, codes=codes), seed=seed, processes=processes)
+        summary = summarize(replicas)
+        report['null_mean'] = [summary[name]['mean'] for name in report.index]
+        report['null_std'] = [summary[name]['std'] for name in report.index]
+        report['z_score'] = (report['homophily'] - report['null_mean']) / report['null_std'].replace(0, np.nan)
+    return report
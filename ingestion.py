@@ -0,0 +1,234 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import networkx as nx
+
+from graph_builder import coappearance_edges
+from compact_graph import CompactGraph
+
+# Columns kept for each Transfermarkt table, with compact dtypes
+SCHEMAS = {
+    'appearances': {
+        'game_id': 'int32',
+        'player_id': 'int32',
+        'player_name': 'string',
+        'player_club': 'category',
+        'competition_id': 'category',
+        'date': 'string',
+    },
+    'game_events': {
+        'game_id': 'int32',
+        'player_id': 'Int32',
+        'club_id': 'category',
+        'type': 'category',
+    },
+    'game_lineups': {
+        'game_id': 'int32',
+        'player_id': 'int32',
+        'club_id': 'category',
+        'position': 'category',
+    },
+    'players': {
+        'player_id': 'int32',
+        'name': 'object',
+        'country_of_citizenship': 'category',
+        'current_club_id': 'Int32',
+        'position': 'category',
+    },
+    'games': {
+        'game_id': 'int32',
+        'competition_id': 'category',
+        'season': 'Int16',
+        'date': 'string',
+        'home_club_id': 'Int32',
+        'away_club_id': 'Int32',
+        'home_club_goals': 'Int16',
+        'away_club_goals': 'Int16',
+    },
+    'player_valuations': {
+        'player_id': 'int32',
+        'date': 'string',
+        'market_value_in_eur': 'float64',
+    },
+}
+
+DEFAULT_CHUNKSIZE = 500_000
+
+
+# Function to read a table chunk by chunk with its column subset and dtypes
+def stream_table(path, table, chunksize=DEFAULT_CHUNKSIZE, competitions=None):
+    schema = SCHEMAS[table]
+    reader = pd.read_csv(path, usecols=lambda column: column in schema, dtype=schema, chunksize=chunksize)
+    for chunk in reader:
+        if competitions is not None and 'competition_id' in chunk.columns:
+            chunk = chunk[chunk['competition_id'].isin(competitions)]
+        yield chunk
+
+
+# Incremental accumulator of co-appearance edge weights
+class CoappearanceAccumulator:
+    """Accumulate the weighted co-appearance edge list from appearance chunks.
+
+    A (club, game) group split across two chunks must be seen whole, so rows
+    are buffered until their game is known to be complete. When the file is
+    ordered by game_id, set sorted_by_game=True and only the last game of
+    each chunk is carried over; otherwise the compact (club, game, player)
+    keys are buffered and paired at the end.
+
+    The order is checked on every chunk: when a game id goes backwards the
+    accumulator falls back to buffering (with a warning), and a ValueError is
+    raised if rows arrive for a game that was already paired, since its
+    weights would be undercounted.
+    """
+
+    def __init__(self, sorted_by_game=False, compact_every=5_000_000):
+        self.sorted_by_game = sorted_by_game
+        self.compact_every = compact_every
+        self._last_game = None
+        self._closed_games = []
+        self._pending = []
+        self._partial_edges = []
+        self._partial_rows = 0
+        self._names = {}
+        self._club_codes = {}
+
+    # Map club ids to stable int32 codes across chunks
+    def _encode_clubs(self, clubs):
+        clubs = clubs.astype(str)
+        for club in clubs.unique():
+            self._club_codes.setdefault(club, len(self._club_codes))
+        return clubs.map(self._club_codes).to_numpy(np.int32)
+
+    def add(self, chunk):
+        keys = pd.DataFrame({
+            'player_club': self._encode_clubs(chunk['player_club']),
+            'game_id': chunk['game_id'].to_numpy(np.int32),
+            'player_id': chunk['player_id'].to_numpy(np.int32),
+        })
+        if 'player_name' in chunk.columns:
+            names = chunk[['player_id', 'player_name']].drop_duplicates('player_id', keep='last')
+            self._names.update(zip(names['player_id'].tolist(), names['player_name'].tolist()))
+
+        if len(keys) == 0:
+            return
+        self._check_order(keys['game_id'].to_numpy())
+        self._pending.append(keys)
+        if not self.sorted_by_game:
+            return
+
+        # Every game but the last one of this chunk is complete
+        pending = pd.concat(self._pending, ignore_index=True)
+        self._last_game = keys['game_id'].iloc[-1]
+        open_rows = pending['game_id'] == self._last_game
+        self._pending = [pending[open_rows]]
+        closed = pending[~open_rows]
+        self._closed_games.append(closed['game_id'].unique())
+        self._add_edges(coappearance_edges(closed))
+
+    # Function to make sure no game already paired gets new rows (falling back to buffering when the order breaks)
+    def _check_order(self, game_ids):
+        backwards = np.any(np.diff(game_ids) < 0) or (self._last_game is not None and game_ids[0] < self._last_game)
+        if self.sorted_by_game and not backwards:
+            return
+        if self._closed_games:
+            closed = np.concatenate(self._closed_games)
+            self._closed_games = [closed]
+            if np.isin(game_ids, closed).any():
+                raise ValueError("Appearances of a game arrived after the game was paired: the file is not sorted "
+                                 "by game_id, use CoappearanceAccumulator(sorted_by_game=False)")
+        if self.sorted_by_game:
+            warnings.warn("Appearances are not sorted by game_id, buffering every row until edges()")
+            self.sorted_by_game = False
+
+    def _add_edges(self, edges):
+        if len(edges) == 0:
+            return
+        edges = edges.astype({'player1': np.int32, 'player2': np.int32, 'weight': np.int32})
+        self._partial_edges.append(edges)
+        self._partial_rows += len(edges)
+        if self._partial_rows > self.compact_every:
+            self._compact()
+
+    # Merge the partial edge lists, summing the weights of repeated pairs
+    def _compact(self):
+        if len(self._partial_edges) > 1:
+            edges = pd.concat(self._partial_edges, ignore_index=True)
+            edges = edges.groupby(['player1', 'player2'], sort=False)['weight'].sum().reset_index()
+            self._partial_edges = [edges]
+        self._partial_rows = sum(len(edges) for edges in self._partial_edges)
+
+    def edges(self):
+        if self._pending:
+            pending = pd.concat(self._pending, ignore_index=True)
+            self._pending = []
+            self._add_edges(coappearance_edges(pending))
+        self._compact()
+        if not self._partial_edges:
+            return pd.DataFrame({'player1': [], 'player2': [], 'weight': []}, dtype=np.int32)
+        return self._partial_edges[0]
+
+    def names(self):
+        return pd.Series(self._names)
+
+    def graph(self):
+        G = nx.Graph()
+        G.add_weighted_edges_from(self.edges().itertuples(index=False, name=None))
+        nx.set_node_attributes(G, self.names().reindex(list(G.nodes())).to_dict(), 'name')
+        return G
+
+    # Same graph as a CompactGraph (int32 indices, uint16 weights, categorical names)
+    def compact_graph(self):
+        return CompactGraph.from_edge_table(self.edges(), self.names())
+
+
+# Incremental accumulator of per-player aggregates
+class PlayerAggregator:
+    def __init__(self):
+        self._appearances = []
+        self._clubs = []
+        self._goals = []
+        self._positions = []
+
+    def add_appearances(self, chunk):
+        self._appearances.append(chunk['player_id'].value_counts())
+        clubs = pd.DataFrame({'player_id': chunk['player_id'].to_numpy(),
+                              'player_club': np.asarray(chunk['player_club'].astype(str))})
+        self._clubs.append(clubs.drop_duplicates())
+
+    def add_events(self, chunk):
+        goals = chunk.loc[chunk['type'] == 'Goals', 'player_id'].dropna().astype(np.int32)
+        self._goals.append(goals.value_counts())
+
+    def add_lineups(self, chunk):
+        positions = chunk.dropna(subset=['position']).drop_duplicates('player_id')
+        self._positions.append(pd.Series(positions['position'].astype(str).to_numpy(),
+                                         index=positions['player_id'].to_numpy()))
+
+    # Distinct (player, club) pairs seen so far
+    def player_clubs(self):
+        if not self._clubs:
+            return pd.DataFrame(columns=['player_id', 'player_club'])
+        self._clubs = [pd.concat(self._clubs, ignore_index=True).drop_duplicates()]
+        return self._clubs[0].copy()
+
+    def result(self):
+        def summed(parts):
+            if not parts:
+                return pd.Series(dtype=np.int64)
+            return pd.concat(parts).groupby(level=0).sum()
+
+        stats = pd.DataFrame({
+            'appearances': summed(self._appearances),
+            'teams_played_for': self.player_clubs().groupby('player_id')['player_club'].nunique(),
+            'goals': summed(self._goals),
+        })
+        stats = stats.fillna(0).astype(np.int64)
+        if self._positions:
+            # Keep the first position seen for each player
+            positions = pd.concat(self._positions)
+            stats['position'] = positions[~positions.index.duplicated()]
+        else:
+            stats['position'] = None
+        stats.index.name = 'player_id'
+        return stats
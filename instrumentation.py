@@ -0,0 +1,173 @@
+import atexit
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# FOOTBALL_PROFILE=1 records every stage and writes the report at exit;
+# FOOTBALL_CPROFILE=1 also dumps one cProfile file per stage
+ENABLED = os.environ.get('FOOTBALL_PROFILE', '0') not in ('', '0', 'false', 'False')
+CPROFILE = os.environ.get('FOOTBALL_CPROFILE', '0') not in ('', '0', 'false', 'False')
+PROFILE_DIR = os.environ.get('FOOTBALL_PROFILE_DIR', 'profiles')
+
+_records = []
+_local = threading.local()
+_profiler_lock = threading.Lock()
+_origin = time.perf_counter()
+
+
+# Function to switch the instrumentation on or off from a script
+def enable(enabled=True, cprofile=None, profile_dir=None):
+    global ENABLED, CPROFILE, PROFILE_DIR
+    ENABLED = enabled
+    if cprofile is not None:
+        CPROFILE = cprofile
+    if profile_dir:
+        PROFILE_DIR = profile_dir
+
+
+# Function to get the peak resident set size of the process in MB (None when unknown)
+def peak_rss_mb():
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kB on Linux, bytes on macOS
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return getattr(info, 'peak_wset', info.rss) / 2 ** 20
+
+
+def _graph_size(graph):
+    if graph is None:
+        return {}
+    return {'nodes': graph.number_of_nodes(), 'edges': graph.number_of_edges()}
+
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+# Function to add a counter (e.g. solver iterations) to the stage being recorded
+def count(name, value=1):
+    if not ENABLED:
+        return
+    stack = _stack()
+    if stack:
+        counters = stack[-1]['counters']
+        counters[name] = counters.get(name, 0) + value
+
+
+# Function to record an error that was handled (an exception or its message), in the stage being recorded
+def record_error(error):
+    message = error if isinstance(error, str) else f'{type(error).__name__}: {error}'
+    collector = getattr(_local, 'collector', None)
+    if collector is not None:
+        collector.append(message)
+        return
+    if not ENABLED:
+        return
+    stack = _stack()
+    if stack:
+        stack[-1].setdefault('handled_errors', []).append(message)
+
+
+# Context manager gathering the errors handled in a block instead of recording them
+@contextmanager
+def collect_errors():
+    """Used in worker processes, which have no stage of their own: the
+    messages are sent back with the result and given to record_error in the
+    parent, inside the stage that started the workers."""
+    previous = getattr(_local, 'collector', None)
+    _local.collector = collected = []
+    try:
+        yield collected
+    finally:
+        _local.collector = previous
+
+
+# Context manager recording wall time, CPU time, peak RSS, graph size and counters of a stage
+@contextmanager
+def stage(name, graph=None, **info):
+    """with stage('spectral', G) as record: ... . The yielded dict can be
+    updated inside the block, e.g. record['graph'] = G once the graph is
+    built. Nothing is measured when the instrumentation is disabled."""
+    if not ENABLED:
+        yield {}
+        return
+    stack = _stack()
+    # Only one cProfile profiler can run at a time in the process: nested stages are profiled by their
+    # parent, and a stage starting while another thread's stage is profiled is not profiled
+    profiler = cProfile.Profile() if CPROFILE and not stack and _profiler_lock.acquire(blocking=False) else None
+    record = {'stage': name, 'parent': stack[-1]['stage'] if stack else None,
+              'counters': {}, 'graph': graph, **info}
+    stack.append(record)
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    if profiler:
+        profiler.enable()
+    try:
+        yield record
+    except BaseException as error:
+        record['error'] = f'{type(error).__name__}: {error}'
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+            _profiler_lock.release()
+        record['start_s'] = start_wall - _origin
+        record['wall_s'] = time.perf_counter() - start_wall
+        record['cpu_s'] = time.process_time() - start_cpu
+        record['peak_rss_mb'] = peak_rss_mb()
+        record['thread'] = threading.get_ident()
+        record.update(_graph_size(record.pop('graph')))
+        if profiler:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, re.sub(r'[^\w\-]+', '_', name) + f'_{len(_records)}.prof')
+            profiler.dump_stats(path)
+            record['cprofile'] = path
+        stack.pop()
+        _records.append(record)
+
+
+def records():
+    return list(_records)
+
+
+# Function to write the records as JSON and as a Chrome trace (chrome://tracing, Perfetto)
+def write_report(directory=None, prefix='stages'):
+    if not _records:
+        return None
+    directory = directory or PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{prefix}_{os.getpid()}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(_records, f, indent=2)
+    events = [{'name': record['stage'], 'ph': 'X', 'pid': os.getpid(), 'tid': record['thread'],
+               'ts': record['start_s'] * 1e6, 'dur': record['wall_s'] * 1e6,
+               'args': {key: value for key, value in record.items()
+                        if key not in ('stage', 'start_s', 'wall_s', 'thread')}}
+              for record in _records]
+    with open(os.path.join(directory, f'{prefix}_{os.getpid()}.trace.json'), 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events}, f)
+    return path
+
+
+def _write_at_exit():
+    if ENABLED:
+        write_report()
+
+
+atexit.register(_write_at_exit)
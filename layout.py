@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+
+from csr import to_csr, csr_edges
+from graph_cache import graph_fingerprint
+
+DEFAULT_CACHE_DIR = '.layout_cache'
+
+# Layouts already computed in this process, keyed by graph fingerprint and parameters
+_memory_cache = {}
+
+
+# Function to compute the repulsive displacement k^2 / d with a one-level Barnes-Hut grid
+def _repulsion(pos, k, theta=1.0, block=2048):
+    """The nodes are binned on a grid of about 10 nodes per cell. A cell whose
+    centroid is far enough (cell width / distance < theta) acts as a single
+    mass at its centroid; the nodes of the closer cells are taken one by one."""
+    n = len(pos)
+    g = int(np.clip(np.sqrt(n / 10), 1, 64))
+    low = pos.min(axis=0)
+    width = max(np.ptp(pos[:, 0]), np.ptp(pos[:, 1]), 1e-9) / g
+    cell_xy = np.minimum(((pos - low) / width).astype(np.int64), g - 1)
+    cell = cell_xy[:, 0] * g + cell_xy[:, 1]
+    mass = np.bincount(cell, minlength=g * g)
+    occupied = np.flatnonzero(mass)
+    centroid = np.stack([np.bincount(cell, weights=pos[:, axis], minlength=g * g)[occupied] for axis in range(2)], axis=1)
+    centroid /= mass[occupied][:, None]
+    # Members of every occupied cell, contiguous in `members`
+    members = np.argsort(cell, kind='stable')
+    cell_ptr = np.zeros(len(occupied) + 1, dtype=np.int64)
+    cell_ptr[1:] = np.cumsum(mass[occupied])
+
+    displacement = np.zeros((n, 2))
+    for start in range(0, n, block):
+        rows = np.arange(start, min(start + block, n))
+        delta = pos[rows, None, :] - centroid[None, :, :]
+        distance = np.maximum(np.hypot(delta[..., 0], delta[..., 1]), 0.01)
+        far = distance * theta > width
+        factor = np.where(far, mass[occupied][None, :] * k * k / distance ** 2, 0.0)
+        displacement[rows] += (delta * factor[..., None]).sum(axis=1)
+
+        near_rows, near_cells = np.nonzero(~far)
+        if len(near_rows) == 0:
+            continue
+        counts = cell_ptr[near_cells + 1] - cell_ptr[near_cells]
+        offsets = np.repeat(cell_ptr[near_cells] - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts)
+        others = members[np.arange(counts.sum()) + offsets]
+        nodes = np.repeat(rows[near_rows], counts)
+        keep = nodes != others
+        nodes, others = nodes[keep], others[keep]
+        delta = pos[nodes] - pos[others]
+        distance = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 0.01)
+        force = delta * (k * k / distance ** 2)[:, None]
+        for axis in range(2):
+            displacement[:, axis] += np.bincount(nodes, weights=force[:, axis], minlength=n)
+    return displacement
+
+
+# Function to compute a force-directed layout (Fruchterman-Reingold with Barnes-Hut repulsion)
+def force_layout(G, seed=42, iterations=50, weight='weight'):
+    """Same forces and cooling as nx.spring_layout (attraction w * d^2 / k along
+    the edges, repulsion k^2 / d between all nodes), but the repulsion of
+    distant groups of nodes is approximated by their centroid, so an
+    iteration costs about O(N * cells + E) instead of O(N^2). Positions are
+    rescaled to [-1, 1] like spring_layout."""
+    nodes, indptr, indices, weights = to_csr(G, weight=weight)
+    n = len(nodes)
+    if n == 0:
+        return {}
+    if n == 1:
+        return {nodes[0]: np.zeros(2)}
+    u, v, w = csr_edges(indptr, indices, weights)
+    loops = u != v
+    u, v, w = u[loops], v[loops], w[loops]
+
+    rng = np.random.default_rng(seed)
+    pos = rng.random((n, 2))
+    k = np.sqrt(1.0 / n)
+    temperature = 0.1 * max(np.ptp(pos[:, 0]), np.ptp(pos[:, 1]))
+    cooling = temperature / (iterations + 1)
+    for _ in range(iterations):
+        displacement = _repulsion(pos, k)
+
+        # Attraction along the edges
+        delta = pos[u] - pos[v]
+        distance = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 0.01)
+        force = delta * (w * distance / k)[:, None]
+        for axis in range(2):
+            displacement[:, axis] -= np.bincount(u, weights=force[:, axis], minlength=n)
+            displacement[:, axis] += np.bincount(v, weights=force[:, axis], minlength=n)
+
+        # Move each node by at most the current temperature
+        length = np.maximum(np.hypot(displacement[:, 0], displacement[:, 1]), 0.01)
+        pos += displacement * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+
+    pos -= pos.mean(axis=0)
+    extent = np.abs(pos).max()
+    if extent > 0:
+        pos /= extent
+    return dict(zip(nodes, pos))
+
+
+# Function to get the layout of a graph, computed once and reused across plots and runs
+def get_layout(G, seed=42, iterations=50, weight='weight', cache_dir=DEFAULT_CACHE_DIR):
+    key = f"{graph_fingerprint(G)}_{seed}_{iterations}_{weight}"
+    if key in _memory_cache:
+        return _memory_cache[key]
+    path = os.path.join(cache_dir, key + '.npy') if cache_dir else None
+    nodes = list(G.nodes())
+    if path and os.path.exists(path):
+        # The fingerprint covers the node order, so the rows match G.nodes()
+        pos = dict(zip(nodes, np.load(path)))
+    else:
+        pos = force_layout(G, seed=seed, iterations=iterations, weight=weight)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(path, np.array([pos[node] for node in nodes]).reshape(len(nodes), 2))
+    _memory_cache[key] = pos
+    return pos
@@ -0,0 +1,88 @@
+import importlib.util
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+
+import pandas as pd
+
+from config import data_path
+from graph_cache import file_fingerprint
+from ingestion import SCHEMAS
+
+# File of every table in the data directory (appearances, game_events and game_lineups are
+# large: scripts stream them with ingestion.stream_table instead of loading them whole)
+TABLE_FILES = {
+    'appearances': 'appearances_reduced.csv',
+    'players': 'players.csv',
+    'games': 'games.csv',
+    'player_valuations': 'player_valuations.csv',
+    'game_events': 'game_events.csv',
+    'game_lineups': 'game_lineups.csv',
+}
+
+# pyarrow parses a CSV with several threads and releases the GIL; the C engine is the fallback
+ENGINE = 'pyarrow' if importlib.util.find_spec('pyarrow') is not None else 'c'
+
+# Tables already parsed in this process, keyed by (path, table, file fingerprint)
+_registry = {}
+_lock = threading.Lock()
+
+
+# Function to parse one table with its column subset and dtypes
+def read_table(path, table, engine=None):
+    engine = engine or ENGINE
+    schema = SCHEMAS.get(table)
+    if schema is None:
+        return pd.read_csv(path, engine=engine)
+    # The pyarrow engine needs an explicit column list (no callable usecols)
+    header = pd.read_csv(path, nrows=0).columns
+    columns = [column for column in header if column in schema]
+    dtypes = {column: schema[column] for column in columns}
+    if engine == 'pyarrow':
+        # Nullable and categorical dtypes are applied after the parse
+        df = pd.read_csv(path, usecols=columns, engine='pyarrow')
+        return df.astype(dtypes)
+    return pd.read_csv(path, usecols=columns, dtype=dtypes, engine=engine)
+
+
+def _key(table, path):
+    path = os.path.abspath(path)
+    return path, table, tuple(file_fingerprint([path])[path] or ())
+
+
+# Function to get a table, parsed once per process and shared by every caller
+def get_table(table, path=None):
+    """Tables are read with the schema of ingestion.SCHEMAS from
+    config.DATA_DIR unless a path is given. A file changed on disk is parsed
+    again. Callers must not modify the returned DataFrame in place."""
+    path = path or data_path(TABLE_FILES[table])
+    key = _key(table, path)
+    with _lock:
+        future = _registry.get(key)
+        owner = future is None
+        if owner:
+            future = _registry[key] = Future()
+    if owner:
+        try:
+            future.set_result(read_table(path, table))
+        except BaseException as error:
+            with _lock:
+                _registry.pop(key, None)
+            future.set_exception(error)
+    return future.result()
+
+
+# Function to load several tables concurrently, so a cold start lasts as long as the largest file
+def load_tables(tables, paths=None, max_workers=None):
+    """tables is a list of table names; paths optionally maps a table to its
+    file. Return {table: DataFrame}."""
+    paths = paths or {}
+    tables = list(tables)
+    with ThreadPoolExecutor(max_workers=max_workers or len(tables) or 1) as executor:
+        futures = {table: executor.submit(get_table, table, paths.get(table)) for table in tables}
+        return {table: future.result() for table, future in futures.items()}
+
+
+def clear_registry():
+    with _lock:
+        _registry.clear()
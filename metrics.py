@@ -0,0 +1,42 @@
+import networkx as nx
+import numpy as np
+
+from instrumentation import record_error
+from clustering import clustering
+
+
+# Function to calculate metrics for a given graph
+def calculate_metrics(graph):
+    try:
+        # Degree centrality
+        degree_centrality = nx.degree_centrality(graph)
+        avg_degree_centrality = np.mean(list(degree_centrality.values()))
+        
+        # Eigenvector centrality with iteration limit
+        eigenvector_centrality = nx.eigenvector_centrality(graph, max_iter=100, tol=1e-06)
+        avg_eigenvector_centrality = np.mean(list(eigenvector_centrality.values()))
+        
+        # Approximate betweenness centrality
+        betweenness_centrality = nx.betweenness_centrality(graph, k=10, seed=42)  # Approximation with k nodes
+        avg_betweenness_centrality = np.mean(list(betweenness_centrality.values()))
+        
+        # Clustering coefficient (triangles counted on the degree-ordered sparse adjacency)
+        avg_clustering_coefficient = clustering(graph, weight=None)['average']
+        
+        # Distribution of nodes in components
+        components = list(nx.connected_components(graph))
+        largest_component_size = len(max(components, key=len))
+        other_components_size = sum(len(comp) for comp in components) - largest_component_size
+        
+        return {
+            "avg_degree_centrality": avg_degree_centrality,
+            "avg_eigenvector_centrality": avg_eigenvector_centrality,
+            "avg_betweenness_centrality": avg_betweenness_centrality,
+            "avg_clustering_coefficient": avg_clustering_coefficient,
+            "largest_component_size": largest_component_size,
+            "other_components_size": other_components_size,
+        }
+    except Exception as e:
+        print(f"Error calculating metrics: {e}")
+        record_error(e)
+        return None
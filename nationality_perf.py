@@ -1,9 +1,16 @@
 import pandas as pd
-
-# Charger les fichiers CSV
-appearances = pd.read_csv('reseaux_complexes/appearances_reduced.csv')
-games = pd.read_csv('reseaux_complexes/games.csv')
-players = pd.read_csv('reseaux_complexes/players.csv')
+from ingestion import stream_table, PlayerAggregator
+from results_table import load_results
+from loader import get_table
+from config import data_path
+
+# Charger les fichiers CSV (appearances par morceaux : seuls les couples joueur/club distincts sont gardés)
+aggregator = PlayerAggregator()
+for chunk in stream_table(data_path('appearances_reduced.csv'), 'appearances'):
+    aggregator.add_appearances(chunk)
+appearances = aggregator.player_clubs()
+appearances['player_club'] = pd.to_numeric(appearances['player_club']).astype('int32')
+players = get_table('players')
 
 # Ajouter la nationalité à la table appearances via players
 
@@ -18,28 +25,20 @@ print("Diversité des nationalités par club :")
 print(diversity_by_club)
 
 
-# Associer la diversité des clubs à la table des jeux
-games = games.merge(diversity_by_club, left_on='home_club_id', right_on='club_id', suffixes=('_home', '_away'))
-games = games.rename(columns={'nationality_diversity': 'nationality_diversity_home'})
-
-games = games.merge(diversity_by_club, left_on='away_club_id', right_on='club_id', suffixes=('', '_away'))
-games = games.rename(columns={'nationality_diversity_away': 'nationality_diversity_away'})
-
-# Vérification des colonnes après fusion
-print(games.columns)
-
-
-# Calculer les performances en fonction de la diversité
-games['home_performance'] = games['home_club_goals'] - games['away_club_goals']
-games['away_performance'] = games['away_club_goals'] - games['home_club_goals']
+# Associer la diversité des clubs à leurs matchs à domicile (jointure sur des clés entières)
+# Comme avant, seuls les matchs dont les deux clubs ont une diversité connue sont gardés
+club_games = load_results('clubs', columns=['club_id', 'opponent_id', 'home', 'goal_difference'])
+home_games = club_games[(club_games['home'] == 1) & club_games['opponent_id'].isin(diversity_by_club['club_id'])]
+home_games = home_games.merge(diversity_by_club, on='club_id')
 
 # Séparer les équipes en fonction de la diversité élevée et faible
-high_diversity_home = games[games['nationality_diversity_home'] > games['nationality_diversity_home'].median()]
-low_diversity_home = games[games['nationality_diversity_home'] <= games['nationality_diversity_home'].median()]
+median_diversity = home_games['nationality_diversity'].median()
+high_diversity_home = home_games[home_games['nationality_diversity'] > median_diversity]
+low_diversity_home = home_games[home_games['nationality_diversity'] <= median_diversity]
 
-# Calculer la performance moyenne
-high_div_home_performance = high_diversity_home['home_performance'].mean()
-low_div_home_performance = low_diversity_home['home_performance'].mean()
+# Calculer la performance moyenne (différence de buts)
+high_div_home_performance = high_diversity_home['goal_difference'].mean()
+low_div_home_performance = low_diversity_home['goal_difference'].mean()
 
 # Afficher les résultats
 print(f"Performance moyenne des équipes à haute diversité à domicile : {high_div_home_performance:.2f}")
@@ -0,0 +1,119 @@
+import numpy as np
+import networkx as nx
+
+from csr import undirected_to_csr
+
+
+# Function to map linear indices of the upper triangle (i < j, row by row) to (i, j)
+def _pair_from_index(k, n):
+    k = np.asarray(k, dtype=np.float64)
+    i = n - 2 - np.floor(np.sqrt(-8 * k + 4 * n * (n - 1) - 7) / 2 - 0.5)
+    j = k + i + 1 - n * (n - 1) / 2 + (n - i) * (n - i - 1) / 2
+    return i.astype(np.int64), j.astype(np.int64)
+
+
+# Function to draw an Erdős-Rényi G(n, p) edge list by geometric edge skipping
+def er_edges(n, p, rng=None):
+    """Return (u, v) arrays with u < v. Only the kept pairs are visited: the
+    gaps between them follow a geometric law, so the cost is O(n + E)."""
+    rng = np.random.default_rng(rng)
+    n_pairs = n * (n - 1) // 2
+    if p <= 0 or n_pairs == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    if p >= 1:
+        return _pair_from_index(np.arange(n_pairs), n)
+
+    indices = []
+    position = -1
+    batch = int(n_pairs * p + 5 * np.sqrt(n_pairs * p) + 16)
+    while position < n_pairs:
+        steps = np.cumsum(rng.geometric(p, size=batch)) + position
+        indices.append(steps[steps < n_pairs])
+        position = steps[-1]
+    return _pair_from_index(np.concatenate(indices), n)
+
+
+# Function to draw a configuration-model edge list by shuffling the stubs
+def configuration_edges(degree_sequence, rng=None):
+    """Return the simple (u, v) edge list, u < v, left after pairing the shuffled
+    stubs and dropping self-loops and repeated pairs, like
+    nx.Graph(nx.configuration_model(...)) without the intermediate MultiGraph."""
+    rng = np.random.default_rng(rng)
+    degrees = np.asarray(degree_sequence, dtype=np.int64)
+    if degrees.sum() % 2:
+        raise nx.NetworkXError('Invalid degree sequence: sum of degrees must be even, not odd')
+    stubs = np.repeat(np.arange(len(degrees)), degrees)
+    rng.shuffle(stubs)
+    u, v = stubs[0::2], stubs[1::2]
+    keep = u != v
+    u, v = np.minimum(u[keep], v[keep]), np.maximum(u[keep], v[keep])
+    keys = np.unique(u * len(degrees) + v)
+    return keys // len(degrees), keys % len(degrees)
+
+
+# Function to randomize a simple graph with degree-preserving double edge swaps
+def rewired_edges(u, v, n_nodes, rng=None, swaps_per_edge=10, max_rounds=1000):
+    """Return a randomized copy of the simple edge list (u, v) with exactly the
+    same degree sequence. Swaps are proposed in batches of disjoint edge pairs
+    and rejected when they would create a self-loop or a repeated edge."""
+    rng = np.random.default_rng(rng)
+    u, v = np.asarray(u, dtype=np.int64), np.asarray(v, dtype=np.int64)
+    u, v = np.minimum(u, v), np.maximum(u, v)
+    n_edges = len(u)
+    if n_edges < 2:
+        return u, v
+    target = swaps_per_edge * n_edges
+    done = 0
+    for _ in range(max_rounds):
+        if done >= target:
+            break
+        keys = np.sort(u * n_nodes + v)
+        order = rng.permutation(n_edges)
+        first, second = order[: n_edges // 2], order[n_edges // 2: 2 * (n_edges // 2)]
+        a, b, c, d = u[first], v[first], u[second], v[second]
+        # Pick one of the two possible rewirings at random
+        flip = rng.random(len(first)) < 0.5
+        c, d = np.where(flip, d, c), np.where(flip, c, d)
+        new1 = np.minimum(a, d), np.maximum(a, d)
+        new2 = np.minimum(c, b), np.maximum(c, b)
+        key1 = new1[0] * n_nodes + new1[1]
+        key2 = new2[0] * n_nodes + new2[1]
+
+        ok = (a != d) & (c != b) & (key1 != key2)
+        ok &= ~_contains(keys, key1) & ~_contains(keys, key2)
+        # Two accepted swaps of the batch must not create the same edge
+        candidates = np.concatenate([np.where(ok, key1, -1 - np.arange(len(ok))),
+                                     np.where(ok, key2, -1 - len(ok) - np.arange(len(ok)))])
+        values, counts = np.unique(candidates, return_counts=True)
+        duplicated = np.isin(candidates, values[counts > 1])
+        ok &= ~(duplicated[: len(ok)] | duplicated[len(ok):])
+
+        u[first[ok]], v[first[ok]] = new1[0][ok], new1[1][ok]
+        u[second[ok]], v[second[ok]] = new2[0][ok], new2[1][ok]
+        done += int(ok.sum())
+    return u, v
+
+
+def _contains(sorted_keys, keys):
+    positions = np.searchsorted(sorted_keys, keys)
+    positions[positions == len(sorted_keys)] = 0
+    return sorted_keys[positions] == keys
+
+
+# Function to turn an edge list into a networkx graph on the nodes 0..n-1 (or the given labels)
+def to_graph(n_nodes, u, v, nodes=None):
+    G = nx.Graph()
+    if nodes is None:
+        G.add_nodes_from(range(n_nodes))
+        G.add_edges_from(zip(u.tolist(), v.tolist()))
+    else:
+        nodes = list(nodes)
+        G.add_nodes_from(nodes)
+        G.add_edges_from((nodes[a], nodes[b]) for a, b in zip(u.tolist(), v.tolist()))
+    return G
+
+
+# Function to turn an edge list into CSR arrays (indptr, indices, weights)
+def to_csr(n_nodes, u, v):
+    return undirected_to_csr(u, v, n_nodes)
@@ -0,0 +1,187 @@
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import networkx as nx
+
+from columnar import save_columns, load_columns, has_columns
+from graph_cache import file_fingerprint
+from graph_builder import coappearance_edges, player_names
+from ingestion import stream_table
+from temporal import season_of
+
+DEFAULT_FLUSH_ROWS = 1_000_000
+PARTITION_VERSION = 1
+
+
+def partition_path(directory, competition, season):
+    return os.path.join(directory, f'competition_id={competition}', f'season={season}')
+
+
+# Function to split the appearances file by competition and season in a single streamed pass
+def partition_appearances(path, directory, chunksize=500_000, competitions=None, flush_rows=DEFAULT_FLUSH_ROWS):
+    """Write directory/competition_id=<id>/season=<year>/part-<n>/ columnar
+    tables (see columnar.save_columns). Rows are buffered per partition;
+    when more than flush_rows rows are buffered in total, the largest
+    buffers are written until half of the budget is free, so memory stays
+    bounded whatever the size of the file and the number of partitions. Existing partitions are removed first, so parts of an older
+    run are never read back. Return the partition list (see list_partitions)."""
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    buffers, buffered, parts = {}, {}, {}
+
+    def flush(key):
+        df = pd.concat(buffers.pop(key), ignore_index=True)
+        buffered.pop(key)
+        part = parts.get(key, 0)
+        parts[key] = part + 1
+        save_columns(df, os.path.join(partition_path(directory, *key), f'part-{part:05d}'))
+
+    for chunk in stream_table(path, 'appearances', chunksize=chunksize, competitions=competitions):
+        chunk = chunk.assign(season=season_of(chunk['date']).astype(np.int16))
+        for (competition, season), rows in chunk.groupby(['competition_id', 'season'], observed=True, sort=False):
+            key = (competition, int(season))
+            buffers.setdefault(key, []).append(rows.drop(columns='season'))
+            buffered[key] = buffered.get(key, 0) + len(rows)
+        total = sum(buffered.values())
+        if total > flush_rows:
+            for key in sorted(buffered, key=buffered.get, reverse=True):
+                if total <= flush_rows // 2:
+                    break
+                total -= buffered[key]
+                flush(key)
+    for key in list(buffers):
+        flush(key)
+    # The meta file is written last, so an interrupted run is partitioned again next time
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(_meta(path, competitions), f)
+    return list_partitions(directory)
+
+
+def _meta(path, competitions):
+    return {'version': PARTITION_VERSION, 'source': file_fingerprint([path]),
+            'competitions': None if competitions is None else sorted(competitions)}
+
+
+# Function to check that a dataset was completely written from the current version of the source file
+def partitions_are_current(directory, path, competitions=None):
+    try:
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            return json.load(f) == _meta(path, competitions)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+
+
+# Function to list the partitions of a dataset written by partition_appearances
+def list_partitions(directory):
+    rows = []
+    if os.path.isdir(directory):
+        for competition_dir in sorted(os.listdir(directory)):
+            if not competition_dir.startswith('competition_id='):
+                continue
+            for season_dir in sorted(os.listdir(os.path.join(directory, competition_dir))):
+                if not season_dir.startswith('season='):
+                    continue
+                path = os.path.join(directory, competition_dir, season_dir)
+                rows.append({'competition_id': competition_dir.split('=', 1)[1],
+                             'season': int(season_dir.split('=', 1)[1]),
+                             'path': path})
+    return pd.DataFrame(rows, columns=['competition_id', 'season', 'path'])
+
+
+# Function to read one partition (all its parts) back as a DataFrame
+def load_partition(path, columns=None):
+    parts = [load_columns(os.path.join(path, part), columns=columns, mmap=False)
+             for part in sorted(os.listdir(path)) if has_columns(os.path.join(path, part))]
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(parts, ignore_index=True)
+
+
+# Function to select the partitions of some competitions and seasons
+def select_partitions(directory, competitions=None, seasons=None):
+    partitions = list_partitions(directory)
+    if competitions is not None:
+        partitions = partitions[partitions['competition_id'].isin(competitions)]
+    if seasons is not None:
+        partitions = partitions[partitions['season'].isin(seasons)]
+    return partitions.reset_index(drop=True)
+
+
+# Function to load the appearances of several partitions as one table
+def load_appearances(directory, competitions=None, seasons=None, columns=None):
+    partitions = select_partitions(directory, competitions, seasons)
+    tables = [load_partition(path, columns) for path in partitions['path']]
+    if not tables:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(tables, ignore_index=True)
+
+
+def _run_partition(task):
+    func, path = task
+    return func(load_partition(path))
+
+
+# Function to run an analysis on every selected partition in parallel
+def run_partitions(directory, func, competitions=None, seasons=None, processes=None):
+    """func gets the appearances DataFrame of one partition and must be a
+    module-level function. Return {(competition_id, season): result}."""
+    partitions = select_partitions(directory, competitions, seasons)
+    keys = list(zip(partitions['competition_id'], partitions['season']))
+    tasks = [(func, path) for path in partitions['path']]
+    if processes == 1 or len(tasks) <= 1:
+        results = [_run_partition(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_run_partition, tasks))
+    return dict(zip(keys, results))
+
+
+# Partition analyses: co-appearance edges and a summary of the partition graph
+def partition_edges(df):
+    return {'edges': coappearance_edges(df), 'names': player_names(df)}
+
+
+def partition_summary(df):
+    edges = coappearance_edges(df)
+    G = nx.Graph()
+    G.add_weighted_edges_from(edges.itertuples(index=False, name=None))
+    components = [len(component) for component in nx.connected_components(G)]
+    return {
+        'appearances': len(df),
+        'games': df['game_id'].nunique(),
+        'players': G.number_of_nodes(),
+        'edges': G.number_of_edges(),
+        'total_weight': int(edges['weight'].sum()),
+        'largest_component_size': max(components, default=0),
+        'density': nx.density(G) if G.number_of_nodes() > 1 else 0.0,
+    }
+
+
+# Function to merge per-partition edge lists into the cross-league co-appearance graph
+def merge_edges(results):
+    """results is the output of run_partitions(..., partition_edges). A (club,
+    game) group never spans two partitions, so summing the weights of the
+    partition edge lists gives the same graph as a build over all the rows."""
+    results = list(results.values())
+    if not results:
+        return nx.Graph()
+    edges = pd.concat([result['edges'] for result in results], ignore_index=True)
+    edges = edges.groupby(['player1', 'player2'], sort=False)['weight'].sum().reset_index()
+    names = pd.concat([result['names'] for result in results])
+    names = names[~names.index.duplicated(keep='last')]
+    G = nx.Graph()
+    G.add_weighted_edges_from(edges.itertuples(index=False, name=None))
+    nx.set_node_attributes(G, names.reindex(list(G.nodes())).to_dict(), 'name')
+    return G
+
+
+# Function to gather per-partition summaries into one table
+def merge_summaries(results):
+    table = pd.DataFrame.from_dict(results, orient='index')
+    table.index = pd.MultiIndex.from_tuples(table.index, names=['competition_id', 'season'])
+    return table.sort_index()
@@ -0,0 +1,134 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import networkx as nx
+
+from csr import to_csr
+from ensemble import replica_seeds
+
+
+# Function to get the size of the largest component after each node of `order` is added
+def largest_component_curve(indptr, indices, order):
+    """Newman-Ziff sweep: nodes are occupied one by one in the given order and
+    merged with their occupied neighbours in a union-find structure.
+    curve[k] is the size of the largest component once the first k nodes of
+    `order` are occupied (curve[0] == 0)."""
+    indptr = indptr.tolist() if hasattr(indptr, 'tolist') else list(indptr)
+    indices = indices.tolist() if hasattr(indices, 'tolist') else list(indices)
+    n = len(indptr) - 1
+    parent = list(range(n))
+    size = [1] * n
+    occupied = [False] * n
+    curve = np.zeros(len(order) + 1, dtype=np.int64)
+    largest = 0
+
+    def find(x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        # Path compression
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    for k, node in enumerate(order.tolist() if hasattr(order, 'tolist') else order, start=1):
+        occupied[node] = True
+        root = find(node)
+        for neighbor in indices[indptr[node]:indptr[node + 1]]:
+            if not occupied[neighbor]:
+                continue
+            other = find(neighbor)
+            if other == root:
+                continue
+            # Union by size
+            if size[root] < size[other]:
+                root, other = other, root
+            parent[other] = root
+            size[root] += size[other]
+        if size[root] > largest:
+            largest = size[root]
+        curve[k] = largest
+    return curve
+
+
+def _random_order_curve(task):
+    indptr, indices, seed = task
+    order = np.random.default_rng(seed).permutation(len(indptr) - 1)
+    return largest_component_curve(indptr, indices, order)
+
+
+# Function to run num_trials random node orderings, spread over worker processes
+def percolation_curves(graph, num_trials, seed=None, processes=None):
+    _, indptr, indices, _ = to_csr(graph)
+    tasks = [(indptr, indices, trial_seed) for trial_seed in replica_seeds(num_trials, seed)]
+    if processes == 1:
+        return np.array([_random_order_curve(task) for task in tasks])
+    workers = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return np.array(list(executor.map(_random_order_curve, tasks, chunksize=max(1, num_trials // (4 * workers)))))
+
+
+# Function to simulate node percolation: average largest component when a fraction p of the nodes is kept
+def simulate_percolation(graph, p_values, num_trials, seed=None, processes=None):
+    """Same quantity as the subgraph-based version of quest9_10: for every p,
+    int(p * N) nodes are kept uniformly at random, averaged over num_trials.
+    Each trial gives the whole curve in a single sweep."""
+    curves = percolation_curves(graph, num_trials, seed, processes)
+    n_kept = [int(p * graph.number_of_nodes()) for p in p_values]
+    return [float(np.mean(curves[:, k])) for k in n_kept]
+
+
+# Function to get the largest component for every integer degree threshold in one sweep
+def degree_threshold_curve(graph):
+    """sizes[t] is the size of the largest component of the subgraph induced by
+    the nodes of degree <= t, for t = 0 .. max degree. Nodes are added in
+    increasing degree order, so every threshold is read off the same sweep."""
+    nodes, indptr, indices, _ = to_csr(graph)
+    degrees = np.array([graph.degree(node) for node in nodes], dtype=np.int64)
+    order = np.argsort(degrees, kind='stable')
+    curve = largest_component_curve(indptr, indices, order)
+    thresholds = np.arange(degrees.max() + 1 if len(degrees) else 1)
+    return curve[np.searchsorted(degrees[order], thresholds, side='right')]
+
+
+# Function to simulate non-uniform percolation at the given degree thresholds
+def simulate_non_uniform_percolation(graph, degree_thresholds):
+    sizes = degree_threshold_curve(graph)
+    return [int(sizes[min(threshold, len(sizes) - 1)]) if threshold >= 0 else 0 for threshold in degree_thresholds]
+
+
+# Function to get the order in which a targeted attack removes the nodes
+def attack_order(graph, strategy='degree', adaptive=False, recompute_every=1, seed=None):
+    """strategy is 'degree', 'betweenness' or 'random'. With adaptive=True the
+    score is recomputed on the remaining graph every recompute_every removals;
+    otherwise the nodes are removed by decreasing initial score."""
+    nodes = list(graph.nodes())
+    if strategy == 'random':
+        return list(np.random.default_rng(seed).permutation(len(nodes)))
+    if strategy not in ('degree', 'betweenness'):
+        raise ValueError(f"Unknown attack strategy: {strategy}")
+
+    index = {node: i for i, node in enumerate(nodes)}
+    remaining = graph.copy()
+    order = []
+    while remaining.number_of_nodes():
+        if strategy == 'degree':
+            scores = dict(remaining.degree())
+        else:
+            scores = nx.betweenness_centrality(remaining)
+        ranked = sorted(scores, key=lambda node: (-scores[node], index[node]))
+        batch = ranked if not adaptive else ranked[:recompute_every]
+        order.extend(index[node] for node in batch)
+        remaining.remove_nodes_from(batch)
+    return order
+
+
+# Function to get the largest component after removing k nodes, for k = 0 .. N
+def attack_curve(graph, strategy='degree', adaptive=False, recompute_every=1, seed=None):
+    """Removing nodes in some order is adding them in the reverse order, so the
+    whole curve comes from one union-find sweep."""
+    _, indptr, indices, _ = to_csr(graph)
+    order = attack_order(graph, strategy, adaptive, recompute_every, seed)
+    curve = largest_component_curve(indptr, indices, order[::-1])
+    return curve[::-1].copy()
@@ -0,0 +1,357 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import lru_cache
+
+import numpy as np
+
+from config import data_path
+from graph_cache import load_graph, file_fingerprint
+from instrumentation import stage as instrumented_stage
+from csr import to_csr, csr_edges
+from metrics import calculate_metrics
+from ensemble import run_ensemble, replica_seeds, summarize, er_replica, configuration_replica, rewired_replica
+from spectral import spectral_centralities
+from betweenness import betweenness_centrality
+from communities import detect_communities
+from percolation import simulate_percolation, simulate_non_uniform_percolation
+from backbone import backbone, fidelity_report
+
+DEFAULT_CACHE_DIR = '.pipeline_cache'
+# Seed of each null-model ensemble
+NULL_MODEL_SEEDS = {'er': 1, 'configuration': 2, 'rewired': 3}
+# Modules of this directory are hashed into the stage keys (see _source_hash)
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# Function to hash the content of a file, reusing the previous digest while its size and mtime are unchanged
+def file_digest(path, cache_dir=DEFAULT_CACHE_DIR):
+    fingerprint = file_fingerprint([path])[os.path.abspath(path)]
+    if fingerprint is None:
+        return None
+    index = {}
+    if cache_dir:
+        index_path = os.path.join(cache_dir, 'file_digests.json')
+        try:
+            with open(index_path, encoding='utf-8') as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+    entry = index.get(os.path.abspath(path))
+    if entry and entry['fingerprint'] == fingerprint:
+        return entry['digest']
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    if not cache_dir:
+        return digest.hexdigest()
+    index[os.path.abspath(path)] = {'fingerprint': fingerprint, 'digest': digest.hexdigest()}
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    return digest.hexdigest()
+
+
+def _is_project_module(module):
+    path = getattr(module, '__file__', None)
+    return path is not None and os.path.dirname(os.path.abspath(path)) == PROJECT_DIR
+
+
+def _code_names(code):
+    names = set(code.co_names)
+    for constant in code.co_consts:
+        if inspect.iscode(constant):
+            names |= _code_names(constant)
+    return names
+
+
+# Function to find the project modules a function depends on, directly or through the modules it imports
+def _dependency_modules(func):
+    modules, functions, seen = set(), [func], set()
+    # Helpers defined next to the stage are followed function by function (the whole
+    # module would make every stage depend on every other one)
+    while functions:
+        function = functions.pop()
+        if function in seen:
+            continue
+        seen.add(function)
+        for name in _code_names(function.__code__):
+            value = function.__globals__.get(name)
+            if inspect.isfunction(value) and value.__module__ == func.__module__:
+                functions.append(value)
+            elif inspect.ismodule(value) or inspect.isfunction(value) or inspect.isclass(value):
+                module = value if inspect.ismodule(value) else inspect.getmodule(value)
+                if _is_project_module(module) and module.__name__ != func.__module__:
+                    modules.add(module)
+    pending = list(modules)
+    while pending:
+        for value in vars(pending.pop()).values():
+            if inspect.ismodule(value) or inspect.isfunction(value) or inspect.isclass(value):
+                module = value if inspect.ismodule(value) else inspect.getmodule(value)
+                if _is_project_module(module) and module not in modules:
+                    modules.add(module)
+                    pending.append(module)
+    return seen, modules
+
+
+@lru_cache(maxsize=None)
+def _module_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# Function to hash the code of a stage: its own source, the helpers it calls and every project module it uses
+def _source_hash(func):
+    functions, modules = _dependency_modules(func)
+    digest = hashlib.sha256()
+    for function in sorted(functions, key=lambda function: function.__qualname__):
+        try:
+            digest.update(inspect.getsource(function).encode())
+        except (OSError, TypeError):
+            digest.update(f'{function.__module__}.{function.__qualname__}'.encode())
+    for module in sorted(modules, key=lambda module: module.__name__):
+        digest.update(module.__name__.encode())
+        digest.update(_module_hash(os.path.abspath(module.__file__)).encode())
+    return digest.hexdigest()
+
+
+# DAG of analysis stages whose results are memoized on disk
+class Pipeline:
+    """Every stage is a function called with the results of its dependencies
+    and its own parameters as keyword arguments. deps is a tuple of stage
+    names (passed under their own name) or a {argument: stage} dict. The key
+    of a stage hashes its code and the project modules it calls (a change
+    in metrics.py invalidates the *_metrics stages), its parameters, the
+    content of its input files and the keys of its dependencies, so a result
+    is recomputed only when something upstream really changed. Independent
+    stages run concurrently in threads, except the stages added with
+    processes=True, which run one at a time."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.stages = {}
+        self._results = {}
+
+    # processes=True marks a stage that opens its own process pool over all the cores
+    def add(self, name, func, deps=(), params=None, files=(), processes=False):
+        deps = dict(deps) if isinstance(deps, dict) else {dep: dep for dep in deps}
+        for dep in deps.values():
+            if dep not in self.stages:
+                raise KeyError(f"Stage {name!r} depends on unknown stage {dep!r}")
+        self.stages[name] = {'func': func, 'deps': deps, 'params': dict(params or {}), 'files': tuple(files),
+                             'processes': processes}
+        return self
+
+    # Function to get the memoization key of a stage
+    def key(self, name, _keys=None):
+        keys = {} if _keys is None else _keys
+        if name not in keys:
+            stage = self.stages[name]
+            description = {
+                'name': name,
+                'code': _source_hash(stage['func']),
+                'params': repr(sorted(stage['params'].items())),
+                'files': [file_digest(path, self.cache_dir) for path in stage['files']],
+                'deps': {argument: self.key(dep, keys) for argument, dep in stage['deps'].items()},
+            }
+            keys[name] = hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()[:20]
+        return keys[name]
+
+    def _path(self, name, key):
+        return os.path.join(self.cache_dir, f'{name}-{key}.pkl')
+
+    def _load(self, name, key):
+        if (name, key) in self._results:
+            return True, self._results[(name, key)]
+        if not self.cache_dir or not os.path.exists(self._path(name, key)):
+            return False, None
+        with open(self._path(name, key), 'rb') as f:
+            result = pickle.load(f)
+        self._results[(name, key)] = result
+        return True, result
+
+    def _execute(self, name, key, inputs):
+        stage = self.stages[name]
+        with instrumented_stage(name, key=key):
+            result = stage['func'](**inputs, **stage['params'])
+        self._results[(name, key)] = result
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Written under a temporary name first, so an interrupted run never leaves a truncated result
+            path = self._path(name, key)
+            with open(path + '.tmp', 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + '.tmp', path)
+        return result
+
+    # Function to get the results of the target stages, computing only what is missing
+    def run(self, targets, workers=None, force=()):
+        """Return {stage: result} for the targets. The dependencies of a
+        memoized stage are not even loaded; stages listed in force are
+        recomputed."""
+        targets = [targets] if isinstance(targets, str) else list(targets)
+        keys = {}
+        results = {}
+        pending = []
+        visited = set()
+
+        # Walk down from the targets, stopping at the stages already memoized
+        def visit(name):
+            if name in visited:
+                return
+            visited.add(name)
+            key = self.key(name, keys)
+            if name not in force:
+                found, result = self._load(name, key)
+                if found:
+                    results[name] = result
+                    return
+            for dep in self.stages[name]['deps'].values():
+                visit(dep)
+            pending.append(name)
+
+        for target in targets:
+            visit(target)
+
+        def inputs(name):
+            return {argument: results[dep] for argument, dep in self.stages[name]['deps'].items()}
+
+        # Stages with their own process pool run alone in the main thread (no core oversubscription,
+        # no fork while other stages are running); the other stages share the thread pool
+        running = {}
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            while pending or running:
+                ready = [name for name in pending if all(dep in results for dep in self.stages[name]['deps'].values())]
+                for name in ready:
+                    if not self.stages[name]['processes']:
+                        pending.remove(name)
+                        running[executor.submit(self._execute, name, keys[name], inputs(name))] = name
+                if running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[running.pop(future)] = future.result()
+                elif ready:
+                    name = ready[0]
+                    pending.remove(name)
+                    results[name] = self._execute(name, keys[name], inputs(name))
+        return {target: results[target] for target in targets}
+
+
+# Stages of the football network analysis
+def reference_graph(path):
+    return load_graph(path)
+
+
+def graph_parameters(reference_graph):
+    nodes, indptr, indices, _ = to_csr(reference_graph)
+    u, v = csr_edges(indptr, indices)
+    n, e = reference_graph.number_of_nodes(), reference_graph.number_of_edges()
+    return {
+        'nodes': nodes,
+        'N': n,
+        'E': e,
+        'p': 2 * e / (n * (n - 1)),
+        'degree_sequence': [d for _, d in reference_graph.degree(nodes)],
+        'u': u,
+        'v': v,
+    }
+
+
+# The single null-model graphs are the first replica of the matching ensemble (same seed as
+# the *_metrics stage), so quest8 and quest9_10 look at a graph quest7 actually scored
+def er_graph(graph_parameters, seed):
+    return er_replica(replica_seeds(1, seed)[0], graph_parameters['N'], graph_parameters['p'])
+
+
+def configuration_graph(graph_parameters, seed):
+    return configuration_replica(replica_seeds(1, seed)[0], graph_parameters['degree_sequence'])
+
+
+def reference_metrics(reference_graph):
+    return calculate_metrics(reference_graph)
+
+
+def ensemble_metrics(graph_parameters, model, n_replicas, seed):
+    parameters = graph_parameters
+    # Each ensemble already spreads its replicas over the cores
+    if model == 'er':
+        return run_ensemble(er_replica, {'n': parameters['N'], 'p': parameters['p']}, n_replicas, seed=seed)
+    if model == 'configuration':
+        return run_ensemble(configuration_replica, {'degree_sequence': parameters['degree_sequence']}, n_replicas, seed=seed)
+    if model == 'rewired':
+        return run_ensemble(rewired_replica, {'u': parameters['u'], 'v': parameters['v'], 'n_nodes': parameters['N']},
+                            n_replicas, seed=seed)
+    raise ValueError(f"Unknown null model: {model}")
+
+
+def centralities(reference_graph):
+    result = spectral_centralities(reference_graph)
+    betweenness = betweenness_centrality(reference_graph)
+    result['betweenness'] = [betweenness[node] for node in result.index]
+    return result
+
+
+def communities(graph, seeds):
+    return detect_communities(graph, seeds=seeds, processes=None)
+
+
+def percolation(reference_graph, er_graph, configuration_graph, p_values, num_trials, seed):
+    graphs = {'reference': reference_graph, 'er': er_graph, 'configuration': configuration_graph}
+    # Every integer degree threshold of the reference graph comes from the same sweep
+    degree_thresholds = np.arange(1, max(d for _, d in reference_graph.degree()) + 1)
+    return {
+        'p_values': np.asarray(p_values),
+        'uniform': {name: simulate_percolation(G, p_values, num_trials, seed=seed) for name, G in graphs.items()},
+        'degree_thresholds': degree_thresholds,
+        'non_uniform': {name: simulate_non_uniform_percolation(G, degree_thresholds) for name, G in graphs.items()},
+    }
+
+
+def null_model_report(reference_metrics, er_metrics, configuration_metrics, rewired_metrics):
+    return {
+        'reference': reference_metrics,
+        'er': summarize(er_metrics),
+        'configuration': summarize(configuration_metrics),
+        'rewired': summarize(rewired_metrics),
+    }
+
+
+def backbone_graph(reference_graph, alpha):
+    return backbone(reference_graph, alpha=alpha)
+
+
+def backbone_fidelity(reference_graph, backbone_graph):
+    return fidelity_report(reference_graph, backbone_graph)
+
+
+# Function to build the DAG shared by the scripts (quest7, quest8, quest9_10)
+def football_pipeline(gexf_path=None, n_replicas=100, community_seeds=(0, 1, 2, 3), backbone_alpha=0.05,
+                      cache_dir=DEFAULT_CACHE_DIR):
+    gexf_path = gexf_path or data_path('football_network.gexf')
+    pipeline = Pipeline(cache_dir)
+    pipeline.add('reference_graph', reference_graph, params={'path': gexf_path}, files=(gexf_path,))
+    pipeline.add('graph_parameters', graph_parameters, deps=('reference_graph',))
+    pipeline.add('er_graph', er_graph, deps=('graph_parameters',), params={'seed': NULL_MODEL_SEEDS['er']})
+    pipeline.add('configuration_graph', configuration_graph, deps=('graph_parameters',),
+                 params={'seed': NULL_MODEL_SEEDS['configuration']})
+    pipeline.add('reference_metrics', reference_metrics, deps=('reference_graph',))
+    for model, seed in NULL_MODEL_SEEDS.items():
+        pipeline.add(f'{model}_metrics', ensemble_metrics, deps=('graph_parameters',),
+                     params={'model': model, 'n_replicas': n_replicas, 'seed': seed}, processes=True)
+    pipeline.add('null_model_report', null_model_report,
+                 deps=('reference_metrics', 'er_metrics', 'configuration_metrics', 'rewired_metrics'))
+    pipeline.add('centralities', centralities, deps=('reference_graph',), processes=True)
+    pipeline.add('backbone_graph', backbone_graph, deps=('reference_graph',), params={'alpha': backbone_alpha})
+    pipeline.add('backbone_fidelity', backbone_fidelity, deps=('reference_graph', 'backbone_graph'), processes=True)
+    for name in ('reference', 'er', 'configuration'):
+        graph = 'reference_graph' if name == 'reference' else f'{name}_graph'
+        pipeline.add(f'{name}_communities', communities, deps={'graph': graph}, params={'seeds': tuple(community_seeds)},
+                     processes=True)
+    pipeline.add('percolation', percolation, deps=('reference_graph', 'er_graph', 'configuration_graph'),
+                 params={'p_values': tuple(np.linspace(0.1, 1.0, 20)), 'num_trials': 30, 'seed': 0},
+                 processes=True)
+    return pipeline
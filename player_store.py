@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import networkx as nx
+
+# Columns of the top players report, in display order
+REPORT_COLUMNS = ['player_id', 'name', 'country', 'market_value_in_eur', 'appearances',
+                  'position', 'teams_played_for', 'goals']
+
+
+# Function to build the player_id-indexed attribute store in one grouped pass per table
+def build_player_store(players_info, player_stats=None, player_valuations=None):
+    """Return one row per player_id with name, nationality, club, position, summed
+    market value, goals, appearances and number of distinct clubs.
+
+    player_stats is the result of ingestion.PlayerAggregator (appearances,
+    teams_played_for, goals, position).
+    """
+    info = players_info.drop_duplicates('player_id').set_index('player_id')
+    store = pd.DataFrame({
+        'name': info['name'],
+        'nationality': info['country_of_citizenship'],
+    })
+    if 'current_club_id' in info.columns:
+        store['club'] = info['current_club_id']
+
+    if player_valuations is not None:
+        market_value = player_valuations.groupby('player_id')['market_value_in_eur'].sum()
+    else:
+        market_value = pd.Series(dtype=np.float64)
+    store = store.join(market_value.rename('market_value_in_eur'), how='outer')
+    store['market_value_in_eur'] = store['market_value_in_eur'].fillna(0)
+
+    if player_stats is not None:
+        store = store.join(player_stats[['appearances', 'teams_played_for', 'goals', 'position']], how='outer')
+        counts = ['appearances', 'teams_played_for', 'goals']
+        store[counts] = store[counts].fillna(0).astype(np.int64)
+
+    store.index.name = 'player_id'
+    return store
+
+
+# Function to copy a column of the store onto the graph nodes
+def set_node_attribute(G, store, column, attribute=None):
+    values = store[column].reindex(list(G.nodes()))
+    nx.set_node_attributes(G, values.to_dict(), attribute or column)
+
+
+# Function to get the report of a list of players with a single join
+def get_players_info(store, player_ids):
+    report = store.reindex(list(player_ids)).rename(columns={'nationality': 'country'})
+    report.index.name = 'player_id'
+    report = report.reset_index()
+    return report[[column for column in REPORT_COLUMNS if column in report.columns]]
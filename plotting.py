@@ -0,0 +1,47 @@
+import os
+import re
+
+import matplotlib
+
+# FOOTBALL_HEADLESS=1 renders every figure to FOOTBALL_FIGURES_DIR instead of opening windows
+HEADLESS = os.environ.get('FOOTBALL_HEADLESS', '0') not in ('', '0', 'false', 'False')
+FIGURES_DIR = os.environ.get('FOOTBALL_FIGURES_DIR', 'figures')
+
+if HEADLESS:
+    matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import networkx as nx
+
+# Function to switch headless mode on or off from a script
+def set_headless(headless=True, figures_dir=None):
+    global HEADLESS, FIGURES_DIR
+    HEADLESS = headless
+    if figures_dir:
+        FIGURES_DIR = figures_dir
+    if headless:
+        plt.switch_backend('Agg')
+
+
+def _file_name(name):
+    return re.sub(r'[^\w\-]+', '_', name).strip('_') or 'figure'
+
+
+# Function to display the current figure, or save it to FIGURES_DIR in headless mode
+def show_figure(name, dpi=150):
+    if not HEADLESS:
+        plt.show()
+        return None
+    os.makedirs(FIGURES_DIR, exist_ok=True)
+    path = os.path.join(FIGURES_DIR, _file_name(name) + '.png')
+    figure = plt.gcf()
+    figure.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close(figure)
+    return path
+
+
+# Function to draw node labels, skipped entirely when font_size is 0
+def draw_labels(G, pos, labels, font_size, **kwargs):
+    if not font_size:
+        return {}
+    return nx.draw_networkx_labels(G, pos, labels, font_size=font_size, **kwargs)
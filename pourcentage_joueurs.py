@@ -1,7 +1,7 @@
-import pandas as pd
+from loader import get_table
 
 # Charger la table players
-players = pd.read_csv('reseaux_complexes/players.csv')
+players = get_table('players')
 
 # Compter les occurrences de chaque nationalité
 nationality_counts = players['country_of_citizenship'].value_counts()
@@ -1,42 +1,25 @@
+from plotting import show_figure
 import networkx as nx
-import community as community_louvain  # For the Louvain algorithm
 import matplotlib.pyplot as plt
-import numpy as np
-from networkx.algorithms.community import louvain_communities
+from layout import get_layout
+from pipeline import football_pipeline
 
-# Load the original graph
+# Louvain seeds tried for each graph (the best modularity is kept)
+COMMUNITY_SEEDS = (0, 1, 2, 3)
 
-G_ref = nx.read_gexf("reseaux_complexes/football_network.gexf")
-
-# Get the parameters of the original graph
-N = G_ref.number_of_nodes()
-E = G_ref.number_of_edges()
-degree_sequence = [d for n, d in G_ref.degree()]
-
-# Calculate the probability p for the Erdős-Rényi model
-p = 2 * E / (N * (N - 1))
-
-# Generate an Erdős-Rényi graph
-G_er = nx.erdos_renyi_graph(N, p)
-
-# Generate a Configuration graph
-G_conf = nx.Graph(nx.configuration_model(degree_sequence))
-
-# Function to detect and visualize communities
-def detect_and_visualize_communities(G, title):
-    # Apply the Louvain algorithm
-    partition = community_louvain.best_partition(G)
-    modularity = community_louvain.modularity(partition, G)
+# Function to visualize the communities detected by the pipeline
+def visualize_communities(G, result, title):
+    # One Louvain partition per graph (best of several seeds, memoized): the colours match the scored partition
+    modularity = result['modularity']
     
     # Distribution of community sizes
-    community_sizes = np.bincount(list(partition.values()))
+    community_sizes = result['sizes']
 
     # Get positions for visualization
-    pos = nx.spring_layout(G, seed=42)
+    pos = get_layout(G, seed=42)
     
     # Draw nodes based on communities
-    communities = louvain_communities(G)
-    community_colors = {node: i for i, community in enumerate(communities) for node in community}
+    community_colors = result['partition']
     node_colors = [community_colors[node] for node in G.nodes()]
 
     plt.figure(figsize=(12, 12))
@@ -45,7 +28,7 @@ def detect_and_visualize_communities(G, title):
     plt.title(f"{title}\nModularité: {modularity:.4f}")
     plt.colorbar(nodes)
     plt.axis('off')
-    plt.show()
+    show_figure(f"communities_{title}")
 
     # Display the distribution of community sizes
     plt.figure(figsize=(10, 6))
@@ -53,13 +36,21 @@ def detect_and_visualize_communities(G, title):
     plt.title(f"Distribution of Community Sizes - {title}")
     plt.xlabel("Communities")
     plt.ylabel("Number of Nodes")
-    plt.show()
+    show_figure(f"community_sizes_{title}")
+
+if __name__ == "__main__":
+    # The graphs and their communities are shared with quest7 and quest9_10 through the pipeline
+    names = ['reference', 'er', 'configuration']
+    results = football_pipeline(community_seeds=COMMUNITY_SEEDS).run(
+        [f'{name}_graph' for name in names] + [f'{name}_communities' for name in names])
 
-# Visualize communities for the reference graph
-detect_and_visualize_communities(G_ref, "Communities in the Reference Network")
+    # Visualize communities for the reference graph
+    visualize_communities(results['reference_graph'], results['reference_communities'],
+                          "Communities in the Reference Network")
 
-# Visualize communities for the Erdős-Rényi graph
-detect_and_visualize_communities(G_er, "Communities in the Erdős-Rényi Graph")
+    # Visualize communities for the Erdős-Rényi graph
+    visualize_communities(results['er_graph'], results['er_communities'], "Communities in the Erdős-Rényi Graph")
 
-# Visualize communities for the Configuration graph
-detect_and_visualize_communities(G_conf, "Communities in the Configuration Graph")
+    # Visualize communities for the Configuration graph
+    visualize_communities(results['configuration_graph'], results['configuration_communities'],
+                          "Communities in the Configuration Graph")
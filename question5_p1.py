@@ -1,38 +1,34 @@
-import pandas as pd
+from plotting import show_figure, draw_labels
 import networkx as nx
 import matplotlib.pyplot as plt
-from networkx.algorithms.community import louvain_communities
+from ingestion import stream_table, CoappearanceAccumulator
+from loader import get_table, TABLE_FILES
+from player_store import build_player_store, set_node_attribute
+from communities import detect_communities
+from layout import get_layout
+from results_table import load_results, WIN
+from config import data_path
 
-# Load data
-df = pd.read_csv('reseaux_complexes/appearances_reduced.csv')
-players_info = pd.read_csv('reseaux_complexes/players.csv')
-games = pd.read_csv('reseaux_complexes/games.csv')
+# Load data (players shared with the other analyses of the process)
+players_info = get_table('players')
 
+# Stream the appearances to build the graph
+builder = CoappearanceAccumulator(sorted_by_game=True)
+for chunk in stream_table(data_path(TABLE_FILES['appearances']), 'appearances'):
+    builder.add(chunk)
 
-# Initialize the graph
-G = nx.Graph()
+# Wins of each player, from the per-(player, game) result table built once
+results = load_results('players', columns=['player_id', 'result'])
+wins = results.loc[results['result'] == WIN, 'player_id'].value_counts()
 
-# Add nodes and edges
-for club, club_group in df.groupby('player_club'):
-    for game_id, game_group in club_group.groupby('game_id'):
-        players = game_group[['player_id', 'player_name']].values.tolist()
-        for i in range(len(players)):
-            for j in range(i + 1, len(players)):
-                player1_id, player1_name = players[i]
-                player2_id, player2_name = players[j]
-                if G.has_edge(player1_id, player2_id):
-                    G[player1_id][player2_id]['weight'] += 1
-                else:
-                    G.add_edge(player1_id, player2_id, weight=1)
-                G.nodes[player1_id]['name'] = player1_name
-                G.nodes[player2_id]['name'] = player2_name
+# Build the graph
+G = builder.graph()
 
 # Compute layout
-pos = nx.spring_layout(G, seed=42)
+pos = get_layout(G, seed=42)
 
 # Step 1: Remarkable Clusters
-communities = louvain_communities(G)
-community_colors = {node: i for i, community in enumerate(communities) for node in community}
+community_colors = detect_communities(G)['partition']
 node_colors = [community_colors[node] for node in G.nodes()]
 
 plt.figure(figsize=(12, 12))
@@ -42,39 +38,32 @@ nx.draw_networkx_labels(G, pos, labels, font_size=5, font_color='black')  # Init
 plt.title("Remarkable Clusters (with player names)")
 plt.colorbar(nodes)
 plt.axis('off')
-plt.show()
+show_figure("remarkable_clusters")
 
 # Step 2: Top Performing Players
-df = df.merge(games[['game_id', 'home_club_id', 'away_club_id', 'home_club_goals', 'away_club_goals']], on='game_id')
-
-df['win'] = ((df['player_club'] == df['home_club_id']) & (df['home_club_goals'] > df['away_club_goals'])) | \
-            ((df['player_club'] == df['away_club_id']) & (df['away_club_goals'] > df['home_club_goals']))
-
-player_performance = df.groupby('player_id')['win'].sum()
-
 for node in G.nodes():
-    G.nodes[node]['performance'] = player_performance.get(node, 0)
+    G.nodes[node]['performance'] = wins.get(node, 0)
 
 performance_values = [G.nodes[node]['performance'] for node in G.nodes()]
 plt.figure(figsize=(12, 12))
 nodes = nx.draw_networkx_nodes(G, pos, node_size=30, node_color=performance_values, cmap=plt.cm.viridis, alpha=0.7)
-nx.draw_networkx_labels(G, pos, labels, font_size=0, font_color='black')
+draw_labels(G, pos, labels, font_size=0, font_color='black')
 plt.colorbar(nodes, label='Number of Wins')
 plt.title("Top Performing Players (with names)")
 plt.axis('off')
-plt.show()
+show_figure("top_performing_players")
 
 # Step 3: Homophily
-for node in G.nodes():
-    G.nodes[node]['nationality'] = players_info.loc[players_info['player_id'] == node, 'country_of_citizenship'].values[0]
+player_store = build_player_store(players_info)
+set_node_attribute(G, player_store, 'nationality')
 
 nationality_colors = {nationality: i for i, nationality in enumerate(players_info['country_of_citizenship'].unique())}
 node_colors = [nationality_colors[G.nodes[node]['nationality']] for node in G.nodes()]
 
 plt.figure(figsize=(12, 12))
 nodes = nx.draw_networkx_nodes(G, pos, node_size=30, node_color=node_colors, cmap=plt.cm.jet, alpha=0.7)
-nx.draw_networkx_labels(G, pos, labels, font_size=0, font_color='black')
+draw_labels(G, pos, labels, font_size=0, font_color='black')
 plt.colorbar(nodes)
 plt.title("Homophily (by nationality, with names)")
 plt.axis('off')
-plt.show()
+show_figure("homophily_nationality")
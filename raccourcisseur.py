@@ -1,24 +1,41 @@
-import pandas as pd
+from config import data_path
+from partitions import partition_appearances, partitions_are_current, list_partitions, load_appearances, run_partitions, partition_summary, merge_summaries
 
-# Charger le fichier CSV
-file_path = 'C:/Users/bouma/intelligencia Comp/Travail 1/reseaux_complexes/appearances1.csv'  # Chemin de votre fichier CSV
+# Fichiers d'entrée et de sortie
+file_path = data_path('appearances1.csv')  # Chemin de votre fichier CSV (dossier FOOTBALL_DATA_DIR)
+dataset_path = data_path('appearances_partitions')  # Jeu de données partitionné par compétition et saison
 output_path = "appearances_reduced.csv"  # Chemin pour le fichier réduit
 
-# Lire le fichier
-print("Chargement des données...")
-df = pd.read_csv(file_path)
+# Compétitions gardées dans le fichier réduit et part des lignes conservées
+competitions = ['GB1']
+fraction = 1
 
-# Filtrer les lignes avec competition_id = GB1
-df = df[df['competition_id'] == 'GB1']
-print(f"Nombre total de lignes après filtrage : {len(df)}")
+if __name__ == "__main__":
+    # Partitionner le fichier une seule fois (lecture par morceaux), puis réutiliser les partitions
+    # tant que le fichier source n'a pas changé et que le partitionnement précédent est complet
+    if not partitions_are_current(dataset_path, file_path):
+        print("Partitionnement des données par compétition et saison...")
+        partition_appearances(file_path, dataset_path)
+    partitions = list_partitions(dataset_path)
+    print(f"{len(partitions)} partitions ({partitions['competition_id'].nunique()} compétitions)")
 
-# Calculer la taille cible (20% des lignes restantes)
-target_size = int(len(df) *1)
-print(f"Nombre de lignes après réduction : {target_size}")
+    # Résumé de chaque ligue et saison, calculé en parallèle
+    summary = merge_summaries(run_partitions(dataset_path, partition_summary, competitions=competitions))
+    print(summary)
 
-# Réduction aléatoire des données
-df_reduced = df.sample(n=target_size, random_state=42)  # `random_state` pour des résultats reproductibles
+    # Lire uniquement les partitions des compétitions voulues
+    df = load_appearances(dataset_path, competitions=competitions)
+    print(f"Nombre total de lignes après filtrage : {len(df)}")
 
-# Sauvegarder le fichier réduit
-df_reduced.to_csv(output_path, index=False)
-print(f"Fichier réduit sauvegardé sous : {output_path}")
+    # Calculer la taille cible
+    target_size = int(len(df) * fraction)
+    print(f"Nombre de lignes après réduction : {target_size}")
+
+    # Réduction aléatoire des données
+    df_reduced = df.sample(n=target_size, random_state=42)  # `random_state` pour des résultats reproductibles
+    # Trier par match : les scripts construisent le graphe en flux (CoappearanceAccumulator(sorted_by_game=True))
+    df_reduced = df_reduced.sort_values('game_id', kind='stable')
+
+    # Sauvegarder le fichier réduit
+    df_reduced.to_csv(output_path, index=False)
+    print(f"Fichier réduit sauvegardé sous : {output_path}")
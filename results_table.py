@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from columnar import save_columns, load_columns
+from config import data_path
+from graph_cache import file_fingerprint
+from ingestion import stream_table
+
+DEFAULT_GAMES = data_path('games.csv')
+DEFAULT_APPEARANCES = data_path('appearances_reduced.csv')
+DEFAULT_DIRECTORY = data_path('results_table')
+TABLE_VERSION = 1
+
+# Result codes of the 'result' column
+WIN, DRAW, LOSS = 1, 0, -1
+
+
+# Function to get one row per (club, game) from the games table
+def club_results(games):
+    """Return club_id, opponent_id, game_id, home (1 at home, 0 away), goals_for,
+    goals_against, goal_difference and result (WIN, DRAW or LOSS), with
+    int32 keys and small integer values. Games without a score are dropped."""
+    games = games.dropna(subset=['home_club_id', 'away_club_id', 'home_club_goals', 'away_club_goals'])
+    game_id = games['game_id'].to_numpy(np.int32)
+    home_club = games['home_club_id'].to_numpy(np.int32)
+    away_club = games['away_club_id'].to_numpy(np.int32)
+    home_goals = games['home_club_goals'].to_numpy(np.int16)
+    away_goals = games['away_club_goals'].to_numpy(np.int16)
+
+    goals_for = np.concatenate([home_goals, away_goals])
+    goals_against = np.concatenate([away_goals, home_goals])
+    difference = goals_for - goals_against
+    return pd.DataFrame({
+        'club_id': np.concatenate([home_club, away_club]),
+        'opponent_id': np.concatenate([away_club, home_club]),
+        'game_id': np.concatenate([game_id, game_id]),
+        'home': np.repeat(np.array([1, 0], dtype=np.int8), len(games)),
+        'goals_for': goals_for,
+        'goals_against': goals_against,
+        'goal_difference': difference.astype(np.int16),
+        'result': np.sign(difference).astype(np.int8),
+    })
+
+
+# Function to attach the result of their club to a chunk of appearances
+def player_results(appearances, clubs):
+    """Return one row per (player, game) with the club columns of club_results,
+    joined on the integer (game_id, club_id) key."""
+    rows = pd.DataFrame({
+        'player_id': appearances['player_id'].to_numpy(np.int32),
+        'game_id': appearances['game_id'].to_numpy(np.int32),
+        'club_id': pd.to_numeric(appearances['player_club'].astype(str), errors='coerce'),
+    }).dropna(subset=['club_id'])
+    rows['club_id'] = rows['club_id'].astype(np.int32)
+    rows = rows.drop_duplicates(['player_id', 'game_id'])
+    return rows.merge(clubs, on=['game_id', 'club_id'], how='inner')
+
+
+# Function to build the club and player result tables and store them as columns
+def build_results_tables(games_path=DEFAULT_GAMES, appearances_path=DEFAULT_APPEARANCES,
+                         directory=DEFAULT_DIRECTORY):
+    games = pd.read_csv(games_path, usecols=['game_id', 'home_club_id', 'away_club_id',
+                                             'home_club_goals', 'away_club_goals'])
+    clubs = club_results(games)
+    players = pd.concat([player_results(chunk, clubs)
+                         for chunk in stream_table(appearances_path, 'appearances')], ignore_index=True)
+    players = players.drop_duplicates(['player_id', 'game_id'])
+
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    save_columns(clubs, os.path.join(directory, 'clubs'))
+    save_columns(players, os.path.join(directory, 'players'))
+    # The meta file is written last, so an interrupted build is rebuilt next time
+    with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'version': TABLE_VERSION, 'sources': file_fingerprint((games_path, appearances_path))}, f)
+    return clubs, players
+
+
+# Function to load a result table ('clubs' or 'players'), building it when missing or stale
+def load_results(table='players', games_path=DEFAULT_GAMES, appearances_path=DEFAULT_APPEARANCES,
+                 directory=DEFAULT_DIRECTORY, columns=None):
+    try:
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        meta = None
+    fingerprint = file_fingerprint((games_path, appearances_path))
+    if meta is None or meta.get('version') != TABLE_VERSION or meta.get('sources') != fingerprint:
+        build_results_tables(games_path, appearances_path, directory)
+    return load_columns(os.path.join(directory, table), columns=columns)
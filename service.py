@@ -0,0 +1,213 @@
+import argparse
+import json
+from functools import lru_cache
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.csgraph import breadth_first_order
+
+from compact_graph import CompactGraph, player_id_array
+from config import data_path
+from pipeline import football_pipeline
+
+DEFAULT_CACHE_SIZE = 4096
+
+# Arguments every query needs (a missing one is a bad request, not an unknown player)
+REQUIRED_ARGUMENTS = {'topk': ('metric',), 'ego': ('player',), 'weight': ('a', 'b'), 'path': ('a', 'b'), 'metrics': ()}
+
+
+# Query engine over the graph and its precomputed metrics, kept in memory between requests
+class GraphService:
+    """Every query returns plain JSON-serializable values. Results are kept
+    in an LRU cache, so repeated dashboard queries cost a dict lookup."""
+
+    def __init__(self, graph, metrics, cache_size=DEFAULT_CACHE_SIZE):
+        self.graph = graph
+        self.metrics = metrics
+        n = graph.number_of_nodes()
+        self._adjacency = sp.csr_matrix((np.ones(len(graph.indices)), graph.indices, graph.indptr), shape=(n, n))
+        self._names = graph.attribute('name') if 'name' in graph.attributes else None
+        self.top_k = lru_cache(maxsize=cache_size)(self._top_k)
+        self.ego = lru_cache(maxsize=cache_size)(self._ego)
+        self.weight = lru_cache(maxsize=cache_size)(self._weight)
+        self.path = lru_cache(maxsize=cache_size)(self._path)
+
+    # Function to load the reference graph and the memoized centralities of the pipeline
+    @classmethod
+    def from_pipeline(cls, gexf_path=None, cache_size=DEFAULT_CACHE_SIZE):
+        results = football_pipeline(gexf_path).run(['reference_graph', 'centralities'])
+        graph = CompactGraph.from_networkx(results['reference_graph'])
+        metrics = results['centralities'].copy()
+        metrics.index = player_id_array(metrics.index)
+        metrics['degree'] = graph.degree()
+        metrics['strength'] = graph.strength()
+        return cls(graph, metrics, cache_size)
+
+    def _player(self, i):
+        player = {'player_id': self.graph.player_ids[i].item()}
+        if self._names is not None:
+            name = self._names[i]
+            player['name'] = None if pd.isna(name) else name
+        return player
+
+    def _index(self, player_id):
+        i = int(self.graph.index_of(player_id)[0])
+        if i < 0:
+            raise KeyError(f"Unknown player: {player_id}")
+        return i
+
+    def metric_names(self):
+        return list(self.metrics.columns)
+
+    def _top_k(self, metric, k=5):
+        if metric not in self.metrics.columns:
+            raise KeyError(f"Unknown metric: {metric}")
+        top = self.metrics[metric].nlargest(k)
+        return [{**self._player(self._index(player_id)), metric: float(value)} for player_id, value in top.items()]
+
+    # Neighbours of a player sorted by games played together (k first ones when k is given)
+    def _ego(self, player_id, k=None):
+        i = self._index(player_id)
+        start, end = self.graph.indptr[i], self.graph.indptr[i + 1]
+        neighbours = self.graph.indices[start:end]
+        weights = self.graph.weights[start:end]
+        order = np.argsort(-weights.astype(np.float64), kind='stable')[:k]
+        return {
+            'player': self._player(i),
+            'degree': int(end - start),
+            'neighbours': [{**self._player(j), 'weight': weights[o].item()} for o, j in zip(order, neighbours[order])],
+        }
+
+    # Number of games two players played together (0 when they never did)
+    def _weight(self, a, b):
+        i, j = self._index(a), self._index(b)
+        start, end = self.graph.indptr[i], self.graph.indptr[i + 1]
+        row = self.graph.indices[start:end]
+        position = np.searchsorted(row, j)
+        if position < len(row) and row[position] == j:
+            return self.graph.weights[start + position].item()
+        return 0
+
+    # Shortest path (fewest teammates in between) between two players, None when not connected
+    def _path(self, a, b):
+        i, j = self._index(a), self._index(b)
+        _, predecessors = breadth_first_order(self._adjacency, i, directed=False, return_predecessors=True)
+        if i != j and predecessors[j] < 0:
+            return None
+        path = [j]
+        while path[-1] != i:
+            path.append(predecessors[path[-1]])
+        return [self._player(node) for node in reversed(path)]
+
+    # Function to answer a list of queries {"query": name, ...arguments} in one call
+    def batch(self, queries):
+        answers = []
+        for query in queries:
+            try:
+                answers.append({'result': self.query(**query)})
+            except (KeyError, TypeError, ValueError) as error:
+                answers.append({'error': _error_message(error)})
+        return answers
+
+    def query(self, query, **arguments):
+        if query not in REQUIRED_ARGUMENTS:
+            raise ValueError(f"Unknown query: {query}")
+        for name in REQUIRED_ARGUMENTS[query]:
+            if arguments.get(name) is None:
+                raise ValueError(f"Missing argument: {name}")
+        if query == 'topk':
+            return self.top_k(arguments['metric'], int(arguments.get('k', 5)))
+        if query == 'ego':
+            k = arguments.get('k')
+            return self.ego(_player_id(arguments['player']), None if k is None else int(k))
+        if query == 'weight':
+            return self.weight(_player_id(arguments['a']), _player_id(arguments['b']))
+        if query == 'path':
+            return self.path(_player_id(arguments['a']), _player_id(arguments['b']))
+        return self.metric_names()
+
+    def cache_info(self):
+        return {name: getattr(self, name).cache_info()._asdict() for name in ('top_k', 'ego', 'weight', 'path')}
+
+
+# Function to read a player id given in a query string or a JSON body ("123" and 123 are the same player)
+def _player_id(value):
+    value = player_id_array([value])[0]
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _error_message(error):
+    # str(KeyError) adds quotes around the message
+    return str(error.args[0]) if isinstance(error, KeyError) and error.args else str(error)
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _answer(self, compute):
+            try:
+                self._send(200, compute())
+            except KeyError as error:
+                self._send(404, {'error': _error_message(error)})
+            except (TypeError, ValueError) as error:
+                self._send(400, {'error': str(error)})
+
+        # GET /topk?metric=pagerank&k=5, /ego?player=..., /weight?a=..&b=.., /path?a=..&b=.., /metrics, /cache
+        def do_GET(self):
+            url = urlparse(self.path)
+            arguments = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            name = url.path.strip('/')
+            if name == 'cache':
+                self._answer(service.cache_info)
+            else:
+                self._answer(lambda: service.query(name, **arguments))
+
+        # POST /batch with a JSON list of queries
+        def do_POST(self):
+            if urlparse(self.path).path.strip('/') != 'batch':
+                self._send(404, {'error': 'Unknown endpoint'})
+                return
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                queries = json.loads(self.rfile.read(length) or b'[]')
+            except json.JSONDecodeError as error:
+                self._send(400, {'error': str(error)})
+                return
+            self._answer(lambda: service.batch(queries))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+# Function to start the HTTP service (blocks until interrupted)
+def serve(service, host='127.0.0.1', port=8765):
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"Serving on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local query service for the player network")
+    parser.add_argument('--gexf', default=data_path('football_network.gexf'))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE)
+    args = parser.parse_args()
+    serve(GraphService.from_pipeline(args.gexf, args.cache_size), args.host, args.port)
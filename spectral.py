@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.linalg import eigsh, cg
+
+from csr import to_csr
+from instrumentation import count
+
+
+# Function to build the sparse adjacency matrix (weighted or not) from CSR arrays
+def adjacency_matrix(indptr, indices, weights=None):
+    n = len(indptr) - 1
+    data = np.ones(len(indices)) if weights is None else np.asarray(weights, dtype=np.float64)
+    return sp.csr_matrix((data, np.asarray(indices), np.asarray(indptr)), shape=(n, n))
+
+
+def _unit(x):
+    # Same normalization as networkx: unit Euclidean norm, non-negative entries
+    x = np.abs(x)
+    norm = np.linalg.norm(x)
+    return x / norm if norm else x
+
+
+# Function to compute the leading eigenvector of A (warm-started from v0 when given)
+def eigenvector(A, v0=None, tol=1e-10, max_iter=None):
+    if A.shape[0] == 1:
+        return np.ones(1), float(A[0, 0])
+    if A.shape[0] < 3:
+        values, vectors = np.linalg.eigh(A.toarray())
+        return _unit(vectors[:, -1]), float(values[-1])
+    if v0 is not None:
+        v0 = np.where(v0 > 0, v0, v0[v0 > 0].min(initial=1.0) * 1e-3)
+    values, vectors = eigsh(A, k=1, which='LA', v0=v0, tol=tol, maxiter=max_iter)
+    return _unit(vectors[:, 0]), float(values[0])
+
+
+# Function to compute Katz centrality: solve (I - alpha A) x = beta
+def katz(A, alpha, beta=1.0, x0=None, tol=1e-10):
+    n = A.shape[0]
+    M = sp.identity(n, format='csr') - alpha * A
+    b = np.full(n, beta)
+    if x0 is not None:
+        # Previous solutions are normalized: rescale to the best multiple for this system
+        image = M @ x0
+        x0 = x0 * (b @ image) / (image @ image) if image @ image else None
+    x, info = cg(M, b, x0=x0, rtol=tol, maxiter=10 * n)
+    if info > 0:
+        raise RuntimeError(f"Katz centrality did not converge in {info} iterations")
+    return _unit(x)
+
+
+# Function to compute PageRank by power iteration (dangling nodes spread uniformly)
+def pagerank(A, alpha=0.85, x0=None, tol=1e-10, max_iter=1000):
+    n = A.shape[0]
+    out_strength = np.asarray(A.sum(axis=1)).ravel()
+    dangling = out_strength == 0
+    inverse = np.divide(1.0, out_strength, out=np.zeros(n), where=~dangling)
+    P = sp.diags(inverse) @ A
+    x = np.full(n, 1.0 / n) if x0 is None else x0 / x0.sum()
+    for iteration in range(1, max_iter + 1):
+        previous = x
+        x = alpha * (P.T @ x + previous[dangling].sum() / n) + (1 - alpha) / n
+        if np.abs(x - previous).sum() < n * tol:
+            return x, iteration
+    raise RuntimeError(f"PageRank did not converge in {max_iter} iterations")
+
+
+def _warm_vector(previous, nodes, column):
+    if previous is None or column not in previous.columns:
+        return None
+    # New nodes start from the mean of the previous solution
+    values = previous[column].reindex(nodes)
+    return values.fillna(previous[column].mean()).to_numpy(dtype=np.float64)
+
+
+# Function to compute eigenvector, Katz and PageRank centralities, weighted and unweighted, in one call
+def spectral_centralities(graph, weight='weight', katz_alpha=None, pagerank_alpha=0.85, warm_start=None, tol=1e-10):
+    """Return a DataFrame indexed by node with the columns eigenvector, katz,
+    pagerank and their *_weighted versions (edge attribute `weight`).
+
+    warm_start is a previous result of this function, e.g. before a new
+    matchday was added: its columns are used as starting vectors. By default
+    katz_alpha is 0.85 / largest eigenvalue, which keeps the series convergent.
+    """
+    nodes, indptr, indices, weights = to_csr(graph, weight=weight)
+    result = pd.DataFrame(index=pd.Index(nodes, name='node'))
+    eigenvalues = {}
+    for suffix, edge_weights in (('', None), ('_weighted', weights)):
+        A = adjacency_matrix(indptr, indices, edge_weights)
+        vector, eigenvalue = eigenvector(A, v0=_warm_vector(warm_start, nodes, 'eigenvector' + suffix), tol=tol)
+        result['eigenvector' + suffix] = vector
+        eigenvalues['eigenvector' + suffix] = eigenvalue
+
+        alpha = katz_alpha if katz_alpha is not None else 0.85 / eigenvalue if eigenvalue > 0 else 0.1
+        result['katz' + suffix] = katz(A, alpha, x0=_warm_vector(warm_start, nodes, 'katz' + suffix), tol=tol)
+
+        scores, iterations = pagerank(A, pagerank_alpha, x0=_warm_vector(warm_start, nodes, 'pagerank' + suffix), tol=tol)
+        count('pagerank_iterations' + suffix, iterations)
+        result['pagerank' + suffix] = scores
+    result.attrs['eigenvalues'] = eigenvalues
+    return result
@@ -0,0 +1,280 @@
+import pickle
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import networkx as nx
+
+from graph_builder import coappearance_edges, player_names
+
+
+# Function to get the season of a date (Transfermarkt seasons start in July)
+def season_of(dates):
+    dates = pd.to_datetime(dates)
+    return dates.dt.year.where(dates.dt.month >= 7, dates.dt.year - 1)
+
+
+# Columns kept for the games that may still get rows
+OPEN_COLUMNS = ['game_id', 'player_id', 'player_club']
+
+
+# Function to subtract the weights of an edge list from another one (pairs left at 0 are dropped)
+def _edge_difference(edges, removed):
+    merged = edges.merge(removed, on=['player1', 'player2'], how='left', suffixes=('', '_removed'))
+    merged['weight'] -= merged['weight_removed'].fillna(0).astype(np.int64)
+    return merged.loc[merged['weight'] > 0, ['player1', 'player2', 'weight']].reset_index(drop=True)
+
+
+# Co-appearance graph updated matchday by matchday instead of being rebuilt
+class IncrementalCoappearanceGraph:
+    """Keep the weighted co-appearance graph, the node degrees and strengths,
+    the connected components and a few summary metrics up to date while
+    appearance batches are ingested. The cost of a batch is proportional to
+    the number of new (club, game) groups it contains. Matchdays are kept in
+    date order, whatever the order in which they arrive.
+
+    With window_seasons=k only the k latest seasons are kept: older matchdays
+    are subtracted from the edge weights when a newer season arrives. Games
+    already in the window are skipped when they are ingested again; evicted
+    games are forgotten.
+    """
+
+    def __init__(self, window_seasons=None):
+        self.window_seasons = window_seasons
+        self.G = nx.Graph()
+        self._batches = deque()
+        self._seen_games = set()
+        self._open = pd.DataFrame(columns=OPEN_COLUMNS)
+        self._latest_season = None
+        self._min_season = None
+        self._min_date = None
+        self._parent = {}
+        self._size = {}
+        self._components_dirty = False
+        self._cache = {}
+        self._previous = {}
+        self.total_weight = 0
+        self.largest_component_size = 0
+
+    # Union-find over the players (only additions are handled incrementally)
+    def _find(self, node):
+        root = node
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[node] != root:
+            self._parent[node], node = root, self._parent[node]
+        return root
+
+    def _union(self, u, v):
+        for node in (u, v):
+            if node not in self._parent:
+                self._parent[node] = node
+                self._size[node] = 1
+        root_u, root_v = self._find(u), self._find(v)
+        if root_u == root_v:
+            return
+        if self._size[root_u] < self._size[root_v]:
+            root_u, root_v = root_v, root_u
+        self._parent[root_v] = root_u
+        self._size[root_u] += self._size[root_v]
+        self.largest_component_size = max(self.largest_component_size, self._size[root_u])
+
+    def _rebuild_components(self):
+        self._parent, self._size = {}, {}
+        self.largest_component_size = 0
+        for node in self.G.nodes():
+            self._parent[node] = node
+            self._size[node] = 1
+            self.largest_component_size = max(self.largest_component_size, 1)
+        for u, v in self.G.edges():
+            self._union(u, v)
+        self._components_dirty = False
+
+    # Function to ingest a batch of appearance rows (game_id, date, player_id, player_name, player_club)
+    def add_appearances(self, df):
+        """Rows may come in any order and a game may be split over several
+        calls (e.g. at a stream_table chunk boundary): a game stays open, and
+        later rows are paired with its earlier ones, until a call arrives
+        without it. Rows of closed games (a file ingested twice) and rows
+        older than the window are ignored."""
+        df = df.drop_duplicates(['game_id', 'player_id'])
+        dates = pd.to_datetime(df['date']).dt.normalize()
+        seasons = season_of(dates)
+        if self.window_seasons is not None and len(df):
+            self._latest_season = max(self._latest_season if self._latest_season is not None else seasons.max(),
+                                      seasons.max())
+            self._min_season = max(self._min_season if self._min_season is not None else self._latest_season,
+                                   self._latest_season - self.window_seasons + 1)
+        keep = ~df['game_id'].isin(self._seen_games)
+        if self._min_season is not None:
+            keep &= seasons >= self._min_season
+        if self._min_date is not None:
+            keep &= dates >= self._min_date
+        new_rows, dates = df[keep], dates[keep]
+
+        # The open games of the previous call that are not in this one are complete
+        current = new_rows['game_id'].unique()
+        still_open = self._open['game_id'].isin(current)
+        self._seen_games.update(self._open.loc[~still_open, 'game_id'].unique().tolist())
+        previous_rows = self._open[still_open]
+
+        added = 0
+        for date, rows in new_rows.groupby(dates, sort=True):
+            previous = previous_rows[previous_rows['game_id'].isin(rows['game_id'].unique())]
+            if len(previous):
+                # Only the pairs involving the new rows of a game already partly ingested
+                merged = pd.concat([previous, rows[OPEN_COLUMNS]]).drop_duplicates(['game_id', 'player_id'])
+                edges = _edge_difference(coappearance_edges(merged), coappearance_edges(previous))
+            else:
+                edges = coappearance_edges(rows)
+            self._apply(edges, sign=1)
+            if 'player_name' in rows.columns:
+                names = player_names(rows)
+                nx.set_node_attributes(self.G, names.reindex([n for n in names.index if n in self.G]).to_dict(), 'name')
+            self._add_batch(date, season_of(pd.Series([date])).iloc[0], edges, rows['game_id'].unique())
+            added += len(edges)
+        self._open = pd.concat([previous_rows, new_rows[OPEN_COLUMNS]]).drop_duplicates(['game_id', 'player_id'])
+
+        if self._min_season is not None:
+            self.evict_before_season(self._min_season)
+        return added
+
+    # Function to store the edges of a matchday, keeping the batches in date order
+    def _add_batch(self, date, season, edges, games):
+        i = len(self._batches)
+        while i > 0 and self._batches[i - 1][0] > date:
+            i -= 1
+        if i > 0 and self._batches[i - 1][0] == date:
+            # Later rows of a matchday already stored (split or backfilled)
+            _, _, old_edges, old_games = self._batches[i - 1]
+            edges = pd.concat([old_edges, edges]).groupby(['player1', 'player2'], sort=False)['weight'].sum().reset_index()
+            self._batches[i - 1] = (date, season, edges, np.union1d(old_games, games))
+        else:
+            self._batches.insert(i, (date, season, edges, games))
+
+    def _apply(self, edges, sign):
+        G = self.G
+        for u, v, w in edges.itertuples(index=False, name=None):
+            if sign > 0:
+                if G.has_edge(u, v):
+                    G[u][v]['weight'] += w
+                else:
+                    G.add_edge(u, v, weight=w)
+                if not self._components_dirty:
+                    self._union(u, v)
+            else:
+                G[u][v]['weight'] -= w
+                if G[u][v]['weight'] <= 0:
+                    G.remove_edge(u, v)
+                    self._components_dirty = True
+        self.total_weight += sign * int(edges['weight'].sum())
+        self._cache.clear()
+
+    # Function to drop the matchdays of the seasons before `season` (older rows are ignored from now on)
+    def evict_before_season(self, season):
+        self._min_season = season if self._min_season is None else max(self._min_season, season)
+        while self._batches and self._batches[0][1] < season:
+            self._evict_oldest()
+
+    # Function to drop the matchdays played before `date` (older rows are ignored from now on)
+    def evict_before(self, date):
+        date = pd.Timestamp(date)
+        self._min_date = date if self._min_date is None else max(self._min_date, date)
+        while self._batches and self._batches[0][0] < date:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        _, _, edges, games = self._batches.popleft()
+        self._apply(edges, sign=-1)
+        # Forget the evicted games too, so the set stays the size of the window
+        # (their rows are older than the window and filtered out if they come again)
+        self._seen_games.difference_update(games.tolist())
+        self._open = self._open[~self._open['game_id'].isin(games)]
+        isolated = [node for node in set(edges['player1']) | set(edges['player2'])
+                    if node in self.G and self.G.degree(node) == 0]
+        self.G.remove_nodes_from(isolated)
+        self._components_dirty = True
+
+    # Function to get the component label (root player) of a node
+    def component_of(self, node):
+        if self._components_dirty:
+            self._rebuild_components()
+        return self._find(node)
+
+    def largest_component(self):
+        if self._components_dirty:
+            self._rebuild_components()
+        return self.largest_component_size
+
+    def degree(self, node):
+        return self.G.degree(node)
+
+    def strength(self, node):
+        return self.G.degree(node, weight='weight')
+
+    # Function to get a metric computed on the current graph, cached until the next update
+    def metric(self, name, compute):
+        """compute(G, previous) gets the graph and the value computed before the
+        last update (None the first time), which lets solvers warm-start, e.g.
+        lambda G, previous: spectral_centralities(G, warm_start=previous)."""
+        if name not in self._cache:
+            value = compute(self.G, self._previous.get(name))
+            self._cache[name] = value
+            self._previous[name] = value
+        return self._cache[name]
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+
+# Function to build a small random appearance table over several seasons (for the checks below)
+def _example_appearances(n_games=300, n_players=60, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2019-08-01') + pd.to_timedelta(np.sort(rng.integers(0, 3 * 365, n_games)), unit='D')
+    rows = []
+    for game_id, date in enumerate(dates):
+        for club in (1, 2):
+            for player in rng.choice(n_players // 2, 6, replace=False) + (club - 1) * (n_players // 2):
+                rows.append((game_id, date.strftime('%Y-%m-%d'), int(player), f'p{player}', club))
+    return pd.DataFrame(rows, columns=['game_id', 'date', 'player_id', 'player_name', 'player_club'])
+
+
+def _weights(G):
+    return {tuple(sorted((u, v))): w for u, v, w in G.edges(data='weight')}
+
+
+if __name__ == "__main__":
+    # Regression checks: re-ingestion, games split over several calls and batches out of date order
+    df = _example_appearances()
+    seasons = season_of(df['date'])
+    expected = coappearance_edges(df[seasons == seasons.max()])
+    expected = {(u, v): w for u, v, w in expected.itertuples(index=False, name=None)}
+
+    twice = IncrementalCoappearanceGraph(window_seasons=1)
+    for _ in range(2):
+        for start in range(0, len(df), 500):  # chunk boundaries fall inside games
+            twice.add_appearances(df.iloc[start:start + 500])
+    assert _weights(twice.G) == expected and twice.total_weight == sum(expected.values())
+
+    backwards = IncrementalCoappearanceGraph(window_seasons=1)
+    for season in sorted(seasons.unique(), reverse=True):
+        backwards.add_appearances(df[seasons == season])
+    assert _weights(backwards.G) == expected
+
+    # Matchdays backfilled in random order, each one split over two calls
+    shuffled = IncrementalCoappearanceGraph()
+    for date in np.random.default_rng(0).permutation(df['date'].unique()):
+        rows = df[df['date'] == date]
+        shuffled.add_appearances(rows.iloc[:len(rows) // 2])
+        shuffled.add_appearances(rows.iloc[len(rows) // 2:])
+    batch_dates = [batch[0] for batch in shuffled._batches]
+    assert batch_dates == sorted(batch_dates)
+    full = {(u, v): w for u, v, w in coappearance_edges(df).itertuples(index=False, name=None)}
+    assert _weights(shuffled.G) == full
+    print("temporal checks passed")